@@ -2,9 +2,13 @@
 
 from __future__ import annotations
 
+import functools
 import importlib
 import os
-from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple, Type
+import sys
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
 
 from .base import BaseAgent  # Safe/light to import eagerly
 
@@ -15,20 +19,15 @@ __all__ = [
     "GeminiAgent",
     "GrokAgent",
     "PerplexityAgent",
+    "ProviderRecord",
     "list_available_agents",
     "detect_configured_agents",
     "get_agent_info",
     "create_agent",
 ]
 
-# For type checkers only: use BaseAgent aliases to avoid importing submodules.
-# This satisfies mypy without forcing it to analyze providers at import time.
-if TYPE_CHECKING:
-    ChatGPTAgent = BaseAgent
-    ClaudeAgent = BaseAgent
-    GeminiAgent = BaseAgent
-    GrokAgent = BaseAgent
-    PerplexityAgent = BaseAgent
+# Type checkers read the real class types from __init__.pyi, which shadows this
+# module; `make lint` type-checks this file separately so it cannot drift.
 
 # Map public names to (module_path, class_name) for lazy loading.
 _AGENT_SYMBOLS: Dict[str, Tuple[str, str]] = {
@@ -41,97 +40,162 @@ _AGENT_SYMBOLS: Dict[str, Tuple[str, str]] = {
 
 
 def _load_class(symbol: str) -> Any:
-    """Import the module and return the named class."""
+    """Import the module and return the named class, caching it in module globals."""
+    cached = globals().get(symbol)
+    if cached is not None:
+        return cached
     try:
         module_path, class_name = _AGENT_SYMBOLS[symbol]
     except KeyError as e:
         raise AttributeError(f"Unknown symbol {symbol!r}") from e
-    module = importlib.import_module(module_path)
+    # Already-imported modules skip the import lock and finder bookkeeping.
+    module = sys.modules.get(module_path) or importlib.import_module(module_path)
     try:
-        return getattr(module, class_name)
-    except AttributeError as e:
+        obj = module.__dict__[class_name]
+    except KeyError as e:
         raise ImportError(f"Cannot import name {class_name!r} from {module_path}") from e
+    globals()[symbol] = obj  # later lookups bypass __getattr__ and the import system
+    return obj
 
 
 def __getattr__(name: str) -> Any:  # PEP 562
     """Expose agent classes lazily as module attributes."""
     if name in _AGENT_SYMBOLS:
-        obj = _load_class(name)
-        globals()[name] = obj  # cache for speed
-        return obj
+        return _load_class(name)
     raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
-# Provider registry uses symbols; real classes are resolved on demand.
-_AGENT_REGISTRY: Dict[str, Dict[str, Any]] = {
-    "chatgpt": {
-        "symbol": "ChatGPTAgent",
-        "env_key": "OPENAI_API_KEY",
-        "default_model_attr": "DEFAULT_MODEL",
-        "fallback_model": "gpt-4o",
-    },
-    "claude": {
-        "symbol": "ClaudeAgent",
-        "env_key": "CLAUDEAPIKEY",
-        "env_key_alt": "ANTHROPIC_API_KEY",  # Alternative for backward compatibility
-        "default_model_attr": "DEFAULT_MODEL",
-        "fallback_model": "claude-sonnet-4-5-20250929",
-    },
-    "gemini": {
-        "symbol": "GeminiAgent",
-        "env_key": "GOOGLE_API_KEY",
-        "env_key_alt": "GEMINI_API_KEY",  # Alternative for GitHub Codespaces
-        "default_model_attr": "DEFAULT_MODEL",
-        "fallback_model": "gemini-2.0-flash",
-    },
-    "grok": {
-        "symbol": "GrokAgent",
-        "env_key": "XAI_API_KEY",
-        "default_model_attr": "DEFAULT_MODEL",
-        "fallback_model": "grok-beta",
-    },
-    "perplexity": {
-        "symbol": "PerplexityAgent",
-        "env_key": "PERPLEXITY_API_KEY",
-        "default_model_attr": "DEFAULT_MODEL",
-        "fallback_model": "llama-3.1-sonar-large-128k-online",
-    },
-}
+def __dir__() -> List[str]:  # PEP 562
+    """Advertise lazy agent classes alongside already-loaded names."""
+    return sorted(set(globals()) | set(__all__))
+
+
+@dataclass(frozen=True, slots=True)
+class ProviderRecord:
+    """Static registry entry describing how to load and configure a provider."""
+
+    symbol: str
+    env_key: str
+    fallback_model: str
+    env_key_alt: Optional[str] = None
+    default_model_attr: str = "DEFAULT_MODEL"
+
+    @property
+    def env_keys(self) -> Tuple[str, ...]:
+        """Env vars that may hold the API key, primary first."""
+        return (self.env_key,) if self.env_key_alt is None else (self.env_key, self.env_key_alt)
+
+
+# Provider registry uses symbols; real classes are resolved on demand. Read-only view.
+_AGENT_REGISTRY: Mapping[str, ProviderRecord] = MappingProxyType(
+    {
+        "chatgpt": ProviderRecord(
+            symbol="ChatGPTAgent",
+            env_key="OPENAI_API_KEY",
+            fallback_model="gpt-4o",
+        ),
+        "claude": ProviderRecord(
+            symbol="ClaudeAgent",
+            env_key="CLAUDEAPIKEY",
+            env_key_alt="ANTHROPIC_API_KEY",  # Alternative for backward compatibility
+            fallback_model="claude-sonnet-4-5-20250929",
+        ),
+        "gemini": ProviderRecord(
+            symbol="GeminiAgent",
+            env_key="GOOGLE_API_KEY",
+            env_key_alt="GEMINI_API_KEY",  # Alternative for GitHub Codespaces
+            fallback_model="gemini-2.0-flash",
+        ),
+        "grok": ProviderRecord(
+            symbol="GrokAgent",
+            env_key="XAI_API_KEY",
+            fallback_model="grok-beta",
+        ),
+        "perplexity": ProviderRecord(
+            symbol="PerplexityAgent",
+            env_key="PERPLEXITY_API_KEY",
+            fallback_model="llama-3.1-sonar-large-128k-online",
+        ),
+    }
+)
+
+
+# The registry is read-only, so its sorted key order is fixed at import.
+_SORTED_AGENT_KEYS: Tuple[str, ...] = tuple(sorted(_AGENT_REGISTRY))
+
+# Parallel arrays indexed like _SORTED_AGENT_KEYS: env vars that can supply each
+# agent's API key (primary first), as str and as bytes for os.environb (POSIX),
+# which skips str<->bytes conversion.
+_AGENT_ENV_KEYS: Tuple[Tuple[str, ...], ...] = tuple(
+    _AGENT_REGISTRY[k].env_keys for k in _SORTED_AGENT_KEYS
+)
+_AGENT_ENV_KEYS_B: Tuple[Tuple[bytes, ...], ...] = tuple(
+    tuple(os.fsencode(ek) for ek in env_keys) for env_keys in _AGENT_ENV_KEYS
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _resolve_provider(rec: ProviderRecord) -> Tuple[Callable[..., BaseAgent], str]:
+    """Return (class, default_model_str) for a registry record.
+
+    Memoized: provider classes and their defaults never change within a process.
+    """
+    cls = _load_class(rec.symbol)
+    default_model = getattr(cls, rec.default_model_attr, None) or rec.fallback_model
+    return cls, str(default_model)
 
 
-def _resolve_provider(agent_key: str) -> Tuple[Type[BaseAgent], str, str]:
-    """Return (class, env_key, default_model_str) for an agent key."""
-    rec = _AGENT_REGISTRY[agent_key]
-    cls = _load_class(rec["symbol"])
-    env_key: str = rec["env_key"]
-    default_model = getattr(cls, rec["default_model_attr"], None) or rec["fallback_model"]
-    return cls, env_key, str(default_model)
+def list_available_agents() -> List[str]:
+    return list(_SORTED_AGENT_KEYS)
 
 
-def list_available_agents() -> List[str]:
-    return sorted(_AGENT_REGISTRY.keys())
+def _key_presence() -> Tuple[bool, ...]:
+    """Return, per sorted agent key, whether any of its API-key env vars is set.
+
+    The environment is looked up per call, as create_agent() does, so both always
+    see the same keys. os.environb shares os.environ's storage and skips encoding
+    each key; Windows has no bytes environment and uses str keys.
+    """
+    use_bytes = os.supports_bytes_environ
+    env: Mapping[Any, Any] = os.environb if use_bytes else os.environ
+    probes: Tuple[Tuple[Any, ...], ...] = _AGENT_ENV_KEYS_B if use_bytes else _AGENT_ENV_KEYS
+    return tuple(any(env.get(ek) for ek in keys) for keys in probes)
+
+
+# Last (env presence snapshot, configured agents) pair computed by detect_configured_agents().
+_detect_cache: Optional[Tuple[Tuple[bool, ...], List[str]]] = None
 
 
 def detect_configured_agents() -> List[str]:
-    available: List[str] = []
-    for key, meta in _AGENT_REGISTRY.items():
-        env_key = str(meta["env_key"])
-        # Check primary env key
-        if os.getenv(env_key):
-            available.append(key)
-        # Check alternative env key if specified
-        elif "env_key_alt" in meta and os.getenv(str(meta["env_key_alt"])):
-            available.append(key)
-    return sorted(available)
-
-
-def get_agent_info(agent_type: str) -> Dict[str, Any]:
-    k = agent_type.strip().lower()
-    if k not in _AGENT_REGISTRY:
-        raise ValueError(
-            f"Unknown agent type: {agent_type!r}. Known: {', '.join(list_available_agents())}"
-        )
-    return _AGENT_REGISTRY[k]
+    """Return the sorted agent keys whose API key (primary or alternative) is set.
+
+    The result is cached against a snapshot of which keys are present, so callers
+    that poll availability only rebuild the list when the environment changes.
+    """
+    global _detect_cache
+    snapshot = _key_presence()
+    if _detect_cache is None or _detect_cache[0] != snapshot:
+        # Snapshot is ordered like _SORTED_AGENT_KEYS, so the result needs no sort.
+        available = [k for k, present in zip(_SORTED_AGENT_KEYS, snapshot, strict=True) if present]
+        _detect_cache = (snapshot, available)
+    return list(_detect_cache[1])
+
+
+def _get_record(agent_type: str) -> ProviderRecord:
+    """Normalise and validate a user-supplied agent type in one place."""
+    # Registry keys are already lower-case; only normalise spellings that miss.
+    rec = _AGENT_REGISTRY.get(agent_type)
+    if rec is None:
+        rec = _AGENT_REGISTRY.get(agent_type.strip().lower())
+        if rec is None:
+            raise ValueError(
+                f"Unknown agent type: {agent_type!r}. Known: {', '.join(_SORTED_AGENT_KEYS)}"
+            )
+    return rec
+
+
+def get_agent_info(agent_type: str) -> ProviderRecord:
+    return _get_record(agent_type)
 
 
 def create_agent(
@@ -147,21 +211,20 @@ def create_agent(
     """
     Construct a configured agent instance from the registry.
     """
-    k = agent_type.strip().lower()
-    if k not in _AGENT_REGISTRY:
-        raise ValueError(
-            f"Unknown agent type: {agent_type!r}. Known: {', '.join(list_available_agents())}"
-        )
-
-    cls, env_key, default_model = _resolve_provider(k)
+    rec = _get_record(agent_type)
+    cls, default_model = _resolve_provider(rec)
 
-    # Try to get API key: provided > primary env > alternative env
-    key = api_key or os.getenv(env_key)
-    if not key and "env_key_alt" in _AGENT_REGISTRY[k]:
-        key = os.getenv(str(_AGENT_REGISTRY[k]["env_key_alt"]))
+    # Try to get API key: provided > primary env > alternative env.
+    # api_key and env values are always Optional[str], so test them explicitly.
+    key = api_key
+    if key is None or key == "":
+        env = os.environ
+        key = next((v for ek in rec.env_keys if (v := env.get(ek))), None)
 
-    if not key:
-        raise ValueError(f"Missing API key for {agent_type!r}. Set {env_key} or pass api_key=...")
+    if key is None:
+        raise ValueError(
+            f"Missing API key for {agent_type!r}. Set {rec.env_key} or pass api_key=..."
+        )
 
     selected_model = model if model else default_model
     return cls(
@@ -0,0 +1,54 @@
+"""Type stub for the lazy-loaded agents package.
+
+The runtime module resolves provider classes on first attribute access
+(PEP 562); this stub gives type checkers the real classes without any
+import-time cost.
+"""
+
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+from .base import BaseAgent as BaseAgent
+from .chatgpt import ChatGPTAgent as ChatGPTAgent
+from .claude import ClaudeAgent as ClaudeAgent
+from .gemini import GeminiAgent as GeminiAgent
+from .grok import GrokAgent as GrokAgent
+from .perplexity import PerplexityAgent as PerplexityAgent
+
+__all__ = [
+    "BaseAgent",
+    "ChatGPTAgent",
+    "ClaudeAgent",
+    "GeminiAgent",
+    "GrokAgent",
+    "PerplexityAgent",
+    "ProviderRecord",
+    "list_available_agents",
+    "detect_configured_agents",
+    "get_agent_info",
+    "create_agent",
+]
+
+@dataclass(frozen=True, slots=True)
+class ProviderRecord:
+    symbol: str
+    env_key: str
+    fallback_model: str
+    env_key_alt: Optional[str] = None
+    default_model_attr: str = "DEFAULT_MODEL"
+    @property
+    def env_keys(self) -> Tuple[str, ...]: ...
+
+def list_available_agents() -> List[str]: ...
+def detect_configured_agents() -> List[str]: ...
+def get_agent_info(agent_type: str) -> ProviderRecord: ...
+def create_agent(
+    agent_type: str,
+    queue,
+    logger,
+    *,
+    model: Optional[str] = None,
+    topic: str = "general",
+    timeout: int = 30,
+    api_key: Optional[str] = None,
+) -> BaseAgent: ...
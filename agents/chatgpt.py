@@ -1,6 +1,5 @@
 """OpenAI ChatGPT Agent v5.0 with async support"""
 
-import asyncio
 from typing import Dict, List, Tuple
 
 from core.config import config
@@ -23,34 +22,27 @@ class ChatGPTAgent(BaseAgent):
         # --- END OF FIX ---
 
         try:
-            from openai import OpenAI
+            from openai import AsyncOpenAI
 
             # 2. Use the local 'api_key' variable to init the client.
-            self.client = OpenAI(api_key=api_key)
+            self.client = self._shared_client(api_key, lambda: AsyncOpenAI(api_key=api_key))
         except ImportError:
             raise ImportError("Install: pip install openai") from None
 
     async def _call_api(self, messages: List[Dict]) -> Tuple[str, int]:
         """Call OpenAI API asynchronously"""
         assert self.client is not None, "Client not initialized"
-        client = self.client  # Capture for lambda
+        client = self.client
 
-        # --- THIS IS THE FIX ---
-        # Get the system prompt and add it to the messages list
-        system = self._build_system_prompt()
-        api_messages = [{"role": "system", "content": system}] + messages
-        # --- END OF FIX ---
+        # Prepend the cached system message (built once per agent, not per turn)
+        api_messages = [self._system_message(), *messages]
 
-        # Run blocking API call in executor
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: client.chat.completions.create(
-                model=self.model,
-                messages=api_messages,  # Use the modified list
-                max_tokens=config.MAX_TOKENS,
-                temperature=config.TEMPERATURE,
-            ),
+        # Native async client: awaited on the event loop, no thread hop
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=api_messages,  # Use the modified list
+            max_tokens=config.MAX_TOKENS,
+            temperature=config.TEMPERATURE,
         )
 
         content = response.choices[0].message.content or ""
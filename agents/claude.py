@@ -1,6 +1,5 @@
 """Anthropic Claude Agent v5.0 with async support"""
 
-import asyncio
 from typing import Dict, List, Tuple
 
 from core.config import config
@@ -24,14 +23,16 @@ class ClaudeAgent(BaseAgent):
             import anthropic
 
             # 2. Use the local 'api_key' variable to init the client.
-            self.client = anthropic.Anthropic(api_key=api_key)
+            self.client = self._shared_client(
+                api_key, lambda: anthropic.AsyncAnthropic(api_key=api_key)
+            )
         except ImportError:
             raise ImportError("Install: pip install anthropic") from None
 
     async def _call_api(self, messages: List[Dict]) -> Tuple[str, int]:
         """Call Claude API asynchronously"""
         assert self.client is not None, "Client not initialized"
-        client = self.client  # Capture for lambda
+        client = self.client
 
         # --- THIS IS THE FIX ---
         # Get the system prompt. Claude uses a dedicated 'system' param.
@@ -39,17 +40,31 @@ class ClaudeAgent(BaseAgent):
         # 'messages' already contains the history from BaseAgent
         # --- END OF FIX ---
 
-        # Run blocking API call in executor
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: client.messages.create(
-                model=self.model,
-                max_tokens=config.MAX_TOKENS,
-                temperature=config.TEMPERATURE,
-                system=system,  # Pass system prompt here
-                messages=messages,  # Pass history here
-            ),
+        if config.ENABLE_PROMPT_CACHING and messages:
+            # Cache breakpoint on the newest message: next turn the provider reads
+            # the system prompt and shared history from its prompt cache.
+            last = messages[-1]
+            messages = [
+                *messages[:-1],
+                {
+                    "role": last["role"],
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": last["content"],
+                            "cache_control": {"type": "ephemeral"},
+                        }
+                    ],
+                },
+            ]
+
+        # Native async client: awaited on the event loop, no thread hop
+        response = await client.messages.create(
+            model=self.model,
+            max_tokens=config.MAX_TOKENS,
+            temperature=config.TEMPERATURE,
+            system=system,  # Pass system prompt here
+            messages=messages,  # Pass history here
         )
 
         # Handle TextBlock union - extract text from first content block
@@ -59,6 +74,12 @@ class ClaudeAgent(BaseAgent):
         else:
             content = str(content_block)
 
-        tokens = response.usage.input_tokens + response.usage.output_tokens
+        usage = response.usage
+        tokens = usage.input_tokens + usage.output_tokens
+        # Cached prompt tokens are reported separately from input_tokens
+        for field in ("cache_creation_input_tokens", "cache_read_input_tokens"):
+            extra = getattr(usage, field, None)
+            if isinstance(extra, int):
+                tokens += extra
 
         return content, tokens
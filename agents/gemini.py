@@ -1,8 +1,8 @@
 """Google Gemini Agent v5.0 with async support"""
 
-import asyncio
 from typing import Dict, List, Tuple
 
+from core.common import estimate_tokens
 from core.config import config
 
 from .base import BaseAgent
@@ -38,39 +38,36 @@ class GeminiAgent(BaseAgent):
     async def _call_api(self, messages: List[Dict]) -> Tuple[str, int]:
         """Call Gemini API asynchronously"""
         assert self.client is not None, "Client not initialized"
-        client = self.client  # Capture for closure
+        client = self.client
 
         # --- THIS IS THE FIX ---
         # Gemini wants history in a specific format.
         # The system prompt is already in self.client.
         # BaseAgent's _build_messages gives us user/assistant roles.
 
-        history = []
-        last_message = None
-
-        # Process all but the last message into history
-        for msg in messages[:-1]:
-            # map 'assistant' to 'model'
-            role = "user" if msg["role"] == "user" else "model"
-            history.append({"role": role, "parts": [msg["content"]]})
+        # Single pass over the bounded context window (at most MAX_CONTEXT_MSGS);
+        # the window slides every turn, so there is no stable prefix to cache.
+        history = [
+            {"role": "user" if msg["role"] == "user" else "model", "parts": [msg["content"]]}
+            for msg in messages[:-1]
+        ]
 
         # The last message is the one we are "sending"
-        if messages:
-            last_message = messages[-1]["content"]
+        last_message = messages[-1]["content"] if messages else None
         # --- END OF FIX ---
 
-        # Run blocking API call in executor
-        loop = asyncio.get_running_loop()
-
-        def _sync_call():
-            chat = client.start_chat(history=history)
-            return chat.send_message(last_message or "Continue.")
-
-        response = await loop.run_in_executor(None, _sync_call)
+        # start_chat only builds local state; the request itself goes through the async API
+        chat = client.start_chat(history=history)
+        response = await chat.send_message_async(last_message or "Continue.")
 
         content = response.text
 
-        # Estimate tokens (Gemini doesn't always provide usage info)
-        tokens = len(content) // 4 + sum(len(m["content"]) // 4 for m in messages)
+        # Prefer the exact count Gemini reports; estimate only when usage is missing
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "total_token_count", None)
+        if isinstance(total, int) and total > 0:
+            tokens = total
+        else:
+            tokens = estimate_tokens(content) + sum(estimate_tokens(m["content"]) for m in messages)
 
         return content, tokens
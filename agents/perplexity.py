@@ -1,8 +1,8 @@
 """Perplexity AI Agent v5.0 with async support"""
 
-import asyncio
 from typing import Dict, List, Tuple
 
+from core.common import estimate_tokens
 from core.config import config
 
 from .base import BaseAgent
@@ -21,37 +21,32 @@ class PerplexityAgent(BaseAgent):
         # --- END OF FIX ---
 
         try:
-            from openai import OpenAI
+            from openai import AsyncOpenAI
 
             # 2. Use the local 'api_key' variable to init the client.
-            self.client = OpenAI(api_key=api_key, base_url="https://api.perplexity.ai")
+            self.client = self._shared_client(
+                api_key, lambda: AsyncOpenAI(api_key=api_key, base_url="https://api.perplexity.ai")
+            )
         except ImportError:
             raise ImportError("Install: pip install openai") from None
 
     async def _call_api(self, messages: List[Dict]) -> Tuple[str, int]:
         """Call Perplexity API asynchronously"""
         assert self.client is not None, "Client not initialized"
-        client = self.client  # Capture for lambda
+        client = self.client
 
-        # --- THIS IS THE FIX ---
-        # Get the system prompt and add it to the messages list
-        system = self._build_system_prompt()
-        api_messages = [{"role": "system", "content": system}] + messages
-        # --- END OF FIX ---
+        # Prepend the cached system message (built once per agent, not per turn)
+        api_messages = [self._system_message(), *messages]
 
-        # Run blocking API call in executor
-        loop = asyncio.get_running_loop()
-        response = await loop.run_in_executor(
-            None,
-            lambda: client.chat.completions.create(
-                model=self.model,
-                messages=api_messages,  # Use the modified list
-                max_tokens=config.MAX_TOKENS,
-                temperature=config.TEMPERATURE,
-            ),
+        # Native async client: awaited on the event loop, no thread hop
+        response = await client.chat.completions.create(
+            model=self.model,
+            messages=api_messages,  # Use the modified list
+            max_tokens=config.MAX_TOKENS,
+            temperature=config.TEMPERATURE,
         )
 
         content = response.choices[0].message.content or ""
-        tokens = response.usage.total_tokens if response.usage else len(content) // 4
+        tokens = response.usage.total_tokens if response.usage else estimate_tokens(content)
 
         return content, tokens
@@ -3,7 +3,7 @@
 import argparse
 import asyncio
 import sys
-from typing import Optional, Tuple
+from typing import Any, Callable, Optional, Tuple
 
 from agents import (
     create_agent,
@@ -11,7 +11,7 @@ from agents import (
     get_agent_info,
     list_available_agents,
 )
-from core.common import setup_logging
+from core.common import flush_console, setup_logging
 from core.config import config
 from core.metrics import (
     decrement_conversations,
@@ -21,30 +21,40 @@ from core.metrics import (
 from core.queue import create_queue
 from core.tracing import setup_tracing
 
+_uvloop_run: Optional[Callable[[Any], Any]]
+try:
+    import uvloop
+
+    _uvloop_run = uvloop.run
+except ImportError:  # optional speedup: pip install .[speedups]
+    _uvloop_run = None
+
 
 class ConversationStarter:
     """Interactive conversation starter with async support and CLI flags"""
 
     def __init__(self, args: Optional[argparse.Namespace] = None):
         self.available_agents = detect_configured_agents()
+        # Menu order, sorted once; the selection prompt indexes into it on every retry
+        self._sorted_agents = tuple(sorted(self.available_agents))
         self.conversation_file = args.db if args and args.db else config.DEFAULT_CONVERSATION_FILE
         self.args = args
 
     def _print_banner(self):
-        print("=" * 80)
-        print("AI-TO-AI CONVERSATION PLATFORM v5.0")
-        print("=" * 80)
-        print()
+        # One write per section instead of one per line
+        print("\n".join(("=" * 80, "AI-TO-AI CONVERSATION PLATFORM v5.0", "=" * 80, "")))
 
     def _check_configuration(self) -> bool:
         if not self.available_agents:
-            print("No AI agents configured!")
-            print("\nAdd API keys to .env file or Codespaces secrets:")
-            print("  CLAUDEAPIKEY=your_key")
-            print("  OPENAI_API_KEY=your_key")
-            print("  GOOGLE_API_KEY=your_key (or GEMINI_API_KEY)")
-            print("  XAI_API_KEY=your_key")
-            print("  PERPLEXITY_API_KEY=your_key")
+            print(
+                "No AI agents configured!\n"
+                "\nAdd API keys to .env file or Codespaces secrets:\n"
+                "  CLAUDEAPIKEY=your_key\n"
+                "  OPENAI_API_KEY=your_key\n"
+                "  GOOGLE_API_KEY=your_key (or GEMINI_API_KEY)\n"
+                "  XAI_API_KEY=your_key\n"
+                "  PERPLEXITY_API_KEY=your_key"
+            )
             return False
 
         if len(self.available_agents) < 2 and not (
@@ -55,22 +65,20 @@ class ConversationStarter:
         return True
 
     def _show_available_agents(self):
-        print("AVAILABLE AGENTS:")
-        print("-" * 80)
-
-        for agent_type in sorted(self.available_agents):
-            print(f"  {agent_type}")
-
-        print()
+        lines = ["AVAILABLE AGENTS:", "-" * 80]
+        lines += [f"  {agent_type}" for agent_type in self._sorted_agents]
+        lines.append("")
 
         unavailable = set(list_available_agents()) - set(self.available_agents)
         if unavailable:
-            print("UNAVAILABLE AGENTS:")
-            print("-" * 80)
-            for agent_type in sorted(unavailable):
-                info = get_agent_info(agent_type)
-                print(f"  {agent_type} - Set {info['env_key']}")
-            print()
+            lines += ["UNAVAILABLE AGENTS:", "-" * 80]
+            lines += [
+                f"  {agent_type} - Set {get_agent_info(agent_type).env_key}"
+                for agent_type in sorted(unavailable)
+            ]
+            lines.append("")
+
+        print("\n".join(lines))
 
     def _select_agent(
         self, position: str, cli_agent: Optional[str] = None
@@ -86,13 +94,13 @@ class ConversationStarter:
             return agent_type, None
 
         print(f"\nSelect {position} agent:")
-        for i, a in enumerate(sorted(self.available_agents), 1):
+        for i, a in enumerate(self._sorted_agents, 1):
             print(f"{i}. {a}")
 
         while True:
             choice = input("Enter number: ").strip()
-            if choice.isdigit() and 1 <= int(choice) <= len(self.available_agents):
-                selected = sorted(self.available_agents)[int(choice) - 1]
+            if choice.isdigit() and 1 <= int(choice) <= len(self._sorted_agents):
+                selected = self._sorted_agents[int(choice) - 1]
                 return selected, None
             print("Invalid choice. Try again.")
 
@@ -121,15 +129,18 @@ class ConversationStarter:
         topic: str,
         max_turns: int,
     ):
-        print("\n" + "=" * 80)
-        print("CONVERSATION SETTINGS")
-        print("=" * 80)
-        print(f"Agent 1 : {agent1_type.upper()} ({agent1_model or 'default'})")
-        print(f"Agent 2 : {agent2_type.upper()} ({agent2_model or 'default'})")
-        print(f"Topic   : {topic}")
-        print(f"Turns   : {max_turns}")
-        print(f"DB file : {self.conversation_file}")
-        print("=" * 80)
+        rule = "=" * 80
+        print(
+            f"\n{rule}\n"
+            "CONVERSATION SETTINGS\n"
+            f"{rule}\n"
+            f"Agent 1 : {agent1_type.upper()} ({agent1_model or 'default'})\n"
+            f"Agent 2 : {agent2_type.upper()} ({agent2_model or 'default'})\n"
+            f"Topic   : {topic}\n"
+            f"Turns   : {max_turns}\n"
+            f"DB file : {self.conversation_file}\n"
+            f"{rule}"
+        )
 
     async def run_conversation(
         self,
@@ -168,6 +179,7 @@ class ConversationStarter:
             )
         finally:
             decrement_conversations()
+            await asyncio.gather(agent1.aclose(), agent2.aclose())
 
     async def run_interactive(self):
         self._print_banner()
@@ -259,8 +271,11 @@ def main():
     args = parser.parse_args()
 
     try:
-        asyncio.run(async_main(args))
+        # libuv-backed loop when installed (uvloop.run picks the right API per Python version)
+        run = _uvloop_run if _uvloop_run is not None else asyncio.run
+        run(async_main(args))
     except KeyboardInterrupt:
+        flush_console()  # let interrupted agents' progress lines out first
         print("\n\nCancelled.")
         sys.exit(0)
 
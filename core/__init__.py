@@ -3,7 +3,7 @@
 from .common import add_jitter, log_event, setup_logging, simple_similarity
 from .config import Config, config
 from .metrics import record_call, record_error, record_latency, record_tokens
-from .queue import QueueInterface, RedisQueue, SQLiteQueue, create_queue
+from .queue import QueueInterface, RedisQueue, SQLiteQueue, TurnState, create_queue
 
 __all__ = [
     "config",
@@ -11,6 +11,7 @@ __all__ = [
     "SQLiteQueue",
     "RedisQueue",
     "QueueInterface",
+    "TurnState",
     "create_queue",
     "record_call",
     "record_latency",
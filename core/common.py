@@ -1,32 +1,54 @@
 """Common utilities v5.0"""
 
+import atexit
+import functools
 import hashlib
 import json
 import logging
+import os
+import queue
 import random
 import re
+import sys
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from pathlib import Path
-from typing import Any, Dict
+from typing import AbstractSet, Any, Callable, Dict, FrozenSet, Optional, Tuple
+
+_fast_dumps: Optional[Callable[[Any], bytes]]
+try:
+    from orjson import dumps as _fast_dumps
+except ImportError:  # optional speedup: pip install .[speedups]
+    _fast_dumps = None
 
 
 def setup_logging(agent_name: str, log_dir: str = "logs") -> logging.Logger:
-    """Setup structured JSON logging"""
+    """Setup structured JSON logging
+
+    Calling again with the same name and directory returns the already-configured
+    logger instead of reopening its log file.
+    """
     log_path = Path(log_dir)
     log_path.mkdir(exist_ok=True)
-    log_file = log_path / f"{agent_name}.jsonl"
+    log_file = os.path.abspath(log_path / f"{agent_name}.jsonl")
 
     logger = logging.getLogger(agent_name)
+    if any(
+        isinstance(h, RotatingFileHandler) and h.baseFilename == log_file for h in logger.handlers
+    ):
+        return logger
+
     logger.setLevel(logging.INFO)
     logger.propagate = False
 
-    # Remove existing handlers
+    # Remove existing handlers, closing them so their files are released
     for handler in logger.handlers[:]:
         logger.removeHandler(handler)
+        handler.close()
 
-    # File handler
-    handler = RotatingFileHandler(log_file, maxBytes=10_000_000, backupCount=5)
+    # File handler; the file is opened on the first record, not here
+    handler = RotatingFileHandler(log_file, maxBytes=10_000_000, backupCount=5, delay=True)
     handler.setFormatter(logging.Formatter("%(message)s"))
     logger.addHandler(handler)
 
@@ -38,30 +60,110 @@ def setup_logging(agent_name: str, log_dir: str = "logs") -> logging.Logger:
     return logger
 
 
+def _dumps(obj: Any) -> str:
+    """Serialize to JSON with orjson when available, else the stdlib encoder"""
+    if _fast_dumps is not None:
+        try:
+            return _fast_dumps(obj).decode()
+        except TypeError:
+            pass  # e.g. ints over 64 bits or non-str keys; the stdlib handles those
+    return json.dumps(obj)
+
+
+class _StdoutHandler(logging.StreamHandler):
+    """StreamHandler that always writes to the current sys.stdout (honours redirection)."""
+
+    @property
+    def stream(self):
+        return sys.stdout
+
+    @stream.setter
+    def stream(self, _value):
+        pass
+
+
+_console_lock = threading.Lock()
+_console_listener: Optional[QueueListener] = None
+_console_records: "Optional[queue.Queue[logging.LogRecord]]" = None
+
+
+def get_console_logger() -> logging.Logger:
+    """Return the logger for human-readable console progress output.
+
+    Records go through a QueueHandler to a background QueueListener thread that
+    writes them to stdout, so terminal I/O never blocks the event loop.
+    """
+    global _console_listener, _console_records
+    logger = logging.getLogger("aic.console")
+    with _console_lock:
+        if _console_listener is None:
+            records: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            logger.addHandler(QueueHandler(records))
+            handler = _StdoutHandler()
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            _console_records = records
+            _console_listener = QueueListener(records, handler)
+            _console_listener.start()
+            atexit.register(_console_listener.stop)  # flush pending lines on exit
+    return logger
+
+
+def flush_console(timeout: float = 5.0) -> None:
+    """Block until queued console lines are written to stdout (or timeout elapses).
+
+    Call before writing to stdout directly, so progress lines cannot land after it.
+    """
+    records = _console_records
+    if records is None:
+        return
+    with records.all_tasks_done:
+        records.all_tasks_done.wait_for(lambda: not records.unfinished_tasks, timeout)
+
+
 def log_event(logger: logging.Logger, event_type: str, data: Dict[str, Any]):
     """Log a structured event"""
+    if not logger.isEnabledFor(logging.INFO):
+        return  # record would be dropped; skip the timestamp and serialization
     event = {"timestamp": datetime.now().isoformat(), "event": event_type, **data}
-    logger.info(json.dumps(event))
+    logger.info(_dumps(event))
+
+
+def shingle_set(text: str, n: int = 3, *, lowered: bool = False) -> FrozenSet[Tuple[str, ...]]:
+    """Return the word n-gram shingles of text (all its words if it is shorter than n words)
+
+    Shingles are word tuples built by zipping n offset copies of the word list,
+    so no per-shingle slice or join is needed. Pass lowered=True when text is
+    already lower-case.
+    """
+    if not lowered:
+        text = text.lower()
+    words = text.split()
+    if len(words) < n:
+        return frozenset((tuple(words),))
+    return frozenset(zip(*(words[i:] for i in range(n)), strict=False))  # copies differ in length
+
+
+def shingle_similarity(s1: AbstractSet[Any], s2: AbstractSet[Any]) -> float:
+    """Jaccard similarity of two precomputed shingle sets"""
+    # |A ∪ B| = |A| + |B| - |A ∩ B|: one set operation instead of building the union
+    inter = len(s1 & s2)
+    union = len(s1) + len(s2) - inter
+    if not union:
+        return 0.0
+    return inter / union
 
 
 def simple_similarity(text1: str, text2: str) -> float:
     """Calculate similarity using shingles (word n-grams)"""
-
-    def shingle(t, n=3):
-        words = t.lower().split()
-        if len(words) < n:
-            return set([t.lower()])
-        return set(" ".join(words[i : i + n]) for i in range(len(words) - n + 1))
-
-    s1, s2 = shingle(text1), shingle(text2)
-    if not (s1 | s2):
-        return 0.0
-    return len(s1 & s2) / len(s1 | s2)
+    return shingle_similarity(shingle_set(text1), shingle_set(text2))
 
 
 def hash_message(content: str) -> str:
-    """Generate hash of message"""
-    return hashlib.md5(content.encode()).hexdigest()[:8]
+    """Generate a short (8 hex chars) non-cryptographic fingerprint of a message"""
+    # BLAKE2b sized to 4 bytes: faster than MD5, no truncation, and FIPS-safe
+    return hashlib.blake2b(content.encode(), digest_size=4).hexdigest()
 
 
 def add_jitter(value: float, jitter_range: float = 0.2) -> float:
@@ -69,36 +171,69 @@ def add_jitter(value: float, jitter_range: float = 0.2) -> float:
     return max(0.1, value * (1.0 + random.uniform(-jitter_range, jitter_range)))
 
 
+def full_jitter(backoff: float, minimum: float = 0.1) -> float:
+    """'Full jitter' backoff: uniform in [0, backoff], so retrying clients spread out"""
+    return max(minimum, random.uniform(0.0, backoff))
+
+
+@functools.cache
+def _get_encoding() -> Optional[Any]:
+    """The cl100k BPE, loaded on first use; None when tiktoken is unavailable.
+
+    Loading can mean a download on a cold cache, so it stays off the import path.
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # optional: pip install .[speedups]; the download can fail offline
+        return None
+
+
+def estimate_tokens(text: str) -> int:
+    """Token count for text when the provider reports no usage.
+
+    Uses the cl100k BPE when tiktoken is installed, else ~4 characters per token.
+    """
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4
+
+
+# Compiled once at import; applied in order, so more specific key formats win
+_API_KEY_PATTERNS = (
+    (re.compile(r"(sk-ant-[a-zA-Z0-9-]{20,})"), "[ANTHROPIC_KEY]"),
+    (re.compile(r"(sk-[a-zA-Z0-9]{20,})"), "[OPENAI_KEY]"),
+    (re.compile(r"(pplx-[a-zA-Z0-9]{20,})"), "[PERPLEXITY_KEY]"),
+    (re.compile(r"([A-Za-z0-9]{30,})"), "[API_KEY]"),
+)
+
+# Potential script tags, SQL injection patterns, etc., fused into one alternation
+# so sanitizing is a single scan of the message instead of one pass per pattern.
+_DANGEROUS_RE = re.compile(
+    "|".join(
+        (
+            r"<script[^>]*>.*?</script>",
+            r"javascript:",
+            r"on\w+\s*=",
+            r"DROP\s+TABLE",
+            r"DELETE\s+FROM",
+        )
+    ),
+    re.IGNORECASE,
+)
+
+
 def mask_api_key(text: str) -> str:
     """Mask API keys in logs for security"""
-    # Mask common API key patterns
-    patterns = [
-        (r"(sk-ant-[a-zA-Z0-9-]{20,})", "[ANTHROPIC_KEY]"),
-        (r"(sk-[a-zA-Z0-9]{20,})", "[OPENAI_KEY]"),
-        (r"(pplx-[a-zA-Z0-9]{20,})", "[PERPLEXITY_KEY]"),
-        (r"([A-Za-z0-9]{30,})", "[API_KEY]"),
-    ]
-
     masked = text
-    for pattern, replacement in patterns:
-        masked = re.sub(pattern, replacement, masked)
+    for pattern, replacement in _API_KEY_PATTERNS:
+        masked = pattern.sub(replacement, masked)
 
     return masked
 
 
 def sanitize_content(content: str) -> str:
     """Sanitize model output for logging (prevent injection attacks)"""
-    # Remove potential script tags, SQL injection patterns, etc.
-    dangerous_patterns = [
-        r"<script[^>]*>.*?</script>",
-        r"javascript:",
-        r"on\w+\s*=",
-        r"DROP\s+TABLE",
-        r"DELETE\s+FROM",
-    ]
-
-    sanitized = content
-    for pattern in dangerous_patterns:
-        sanitized = re.sub(pattern, "[FILTERED]", sanitized, flags=re.IGNORECASE)
-
-    return sanitized
+    return _DANGEROUS_RE.sub("[FILTERED]", content)
@@ -55,7 +55,7 @@ class Config:
     MAX_CONSECUTIVE_SIMILAR = int(os.getenv("MAX_CONSECUTIVE_SIMILAR", "2"))
 
     # Termination phrases
-    TOPIC_DRIFT_PHRASES = ["[done]", "i can't continue", "off topic", "unrelated", "loop detected"]
+    TOPIC_DRIFT_PHRASES = ("[done]", "i can't continue", "off topic", "unrelated", "loop detected")
     MIN_TOTAL_TURNS_BEFORE_DONE = int(os.getenv("MIN_TOTAL_TURNS_BEFORE_DONE", "2"))
 
     # Backoff settings
@@ -69,6 +69,17 @@ class Config:
     MAX_TOKENS = int(os.getenv("MAX_TOKENS", "1024"))
     MAX_CONTEXT_MSGS = int(os.getenv("MAX_CONTEXT_MSGS", "10"))
 
+    # Mark the conversation prefix cacheable on providers with explicit prompt caching (Claude)
+    ENABLE_PROMPT_CACHING = os.getenv("ENABLE_PROMPT_CACHING", "false").lower() == "true"
+
+    # Response cache: identical (provider, model, prompt, params) turns skip the API (opt-in)
+    ENABLE_LLM_CACHE = os.getenv("ENABLE_LLM_CACHE", "false").lower() == "true"
+    LLM_CACHE_TTL = float(os.getenv("LLM_CACHE_TTL", "300"))
+    LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "256"))
+
+    # Worker threads shared by all agents for blocking work such as LLM Guard scans
+    BLOCKING_POOL_WORKERS = int(os.getenv("BLOCKING_POOL_WORKERS", "8"))
+
     # Redis settings
     REDIS_URL = os.getenv("REDIS_URL", "")
     USE_REDIS = bool(REDIS_URL)
@@ -82,6 +93,14 @@ class Config:
     # Security
     MAX_MESSAGE_LENGTH = int(os.getenv("MAX_MESSAGE_LENGTH", "100000"))
     ENABLE_LLM_GUARD = os.getenv("ENABLE_LLM_GUARD", "true").lower() == "true"
+    # Skip the PromptInjection model unless a cheap pattern flags the input (opt-in)
+    LLM_GUARD_PREFILTER = os.getenv("LLM_GUARD_PREFILTER", "false").lower() == "true"
+    # Skip the NoRefusal model unless the reply opens like a refusal (opt-in)
+    LLM_GUARD_OUTPUT_PREFILTER = os.getenv("LLM_GUARD_OUTPUT_PREFILTER", "false").lower() == "true"
+    # Scan via a shared llm-guard API server instead of loading models in-process
+    LLM_GUARD_API_URL = os.getenv("LLM_GUARD_API_URL", "")
+    LLM_GUARD_API_TOKEN = os.getenv("LLM_GUARD_API_TOKEN", "")
+    LLM_GUARD_API_TIMEOUT = float(os.getenv("LLM_GUARD_API_TIMEOUT", "10"))
 
     @classmethod
     def get_api_key(cls, env_var: str) -> str:
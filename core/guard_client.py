@@ -0,0 +1,73 @@
+"""Client for a shared, out-of-process LLM Guard API v5.0"""
+
+import json
+from typing import Any, Literal, Optional, Tuple
+
+import urllib3
+
+from .config import config
+
+# One connection pool per process; scans run on the agents' worker threads.
+_http = urllib3.PoolManager(maxsize=config.BLOCKING_POOL_WORKERS)
+
+
+class RemoteGuardScanner:
+    """Drop-in for an llm-guard scanner, backed by the llm-guard API server.
+
+    ``kind="prompt"`` posts to ``/analyze/prompt`` and ``kind="output"`` to
+    ``/analyze/output``. ``scan(prompt, text)`` returns the same
+    ``(sanitized, is_valid, risk_score)`` triple as a local scanner, so model
+    weights live in one service instead of in every agent process.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        kind: Literal["prompt", "output"],
+        token: str = "",
+        timeout: float = 10.0,
+        http: Optional[Any] = None,
+    ):
+        self.url = f"{base_url.rstrip('/')}/analyze/{kind}"
+        self.kind = kind
+        self.timeout = timeout
+        self._http = http or _http
+        self._headers = {"Content-Type": "application/json"}
+        if token:
+            self._headers["Authorization"] = f"Bearer {token}"
+
+    def scan(self, prompt: str, text: str) -> Tuple[str, bool, float]:
+        if self.kind == "prompt":
+            body = {"prompt": text}
+            sanitized_key = "sanitized_prompt"
+        else:
+            body = {"prompt": prompt, "output": text}
+            sanitized_key = "sanitized_output"
+
+        resp = self._http.request(
+            "POST",
+            self.url,
+            body=json.dumps(body).encode(),
+            headers=self._headers,
+            timeout=self.timeout,
+        )
+        if resp.status >= 400:
+            raise RuntimeError(f"LLM Guard API returned HTTP {resp.status}")
+
+        data = json.loads(resp.data)
+        scores = data.get("scanners") or {}
+        risk_score = max(scores.values(), default=0.0)
+        return str(data[sanitized_key]), bool(data["is_valid"]), risk_score
+
+
+def remote_guard_scanners() -> Tuple[RemoteGuardScanner, RemoteGuardScanner]:
+    """(input, output) scanners for the service at config.LLM_GUARD_API_URL"""
+    url, token, timeout = (
+        config.LLM_GUARD_API_URL,
+        config.LLM_GUARD_API_TOKEN,
+        config.LLM_GUARD_API_TIMEOUT,
+    )
+    return (
+        RemoteGuardScanner(url, "prompt", token=token, timeout=timeout),
+        RemoteGuardScanner(url, "output", token=token, timeout=timeout),
+    )
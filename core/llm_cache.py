@@ -0,0 +1,84 @@
+"""In-process response cache for provider API calls v5.0"""
+
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from .config import config
+
+
+class ResponseCache:
+    """TTL + LRU cache of provider responses with request coalescing.
+
+    Concurrent misses on the same key share one in-flight call instead of
+    each hitting the provider. Failures are never cached. Entries are shared by
+    every thread; in-flight calls are coalesced per event loop, since a future
+    can only be awaited on the loop that owns it.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, Tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self._inflight: Dict[Tuple[asyncio.AbstractEventLoop, str], asyncio.Future] = {}
+
+    @staticmethod
+    def make_key(*parts: Any) -> str:
+        """Stable digest of the JSON-serialisable request parts"""
+        raw = json.dumps(parts, sort_keys=True, default=str).encode()
+        return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Any:
+        """Return the cached value, or None when missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: str, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_call(self, key: str, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, calling coro_factory() on a miss"""
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        inflight_key = (asyncio.get_running_loop(), key)
+        inflight = self._inflight.get(inflight_key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(coro_factory())
+        self._inflight[inflight_key] = task
+        try:
+            value = await asyncio.shield(task)
+        finally:
+            self._inflight.pop(inflight_key, None)
+        self.put(key, value)
+        return value
+
+
+response_cache = ResponseCache(config.LLM_CACHE_SIZE, config.LLM_CACHE_TTL)
@@ -11,11 +11,11 @@ import sqlite3
 import time
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Protocol, Tuple
+from typing import Any, Dict, List, NamedTuple, Optional, Protocol, Tuple
 
 from filelock import FileLock, Timeout
 
-from .common import hash_message, log_event
+from .common import _dumps, hash_message, log_event
 from .config import config
 
 
@@ -31,6 +31,13 @@ class ValidationError(Exception):
     pass
 
 
+class TurnState(NamedTuple):
+    """Everything an agent needs to decide whether it may take a turn"""
+
+    terminated: bool
+    last_sender: Optional[str]
+
+
 class QueueInterface(Protocol):
     """Protocol defining the queue interface"""
 
@@ -74,6 +81,10 @@ class SQLiteQueue:
         # File-based lock for inter-process synchronization
         self.lock = FileLock(f"{filepath}.lock", timeout=lock_timeout)
 
+        # In-process change notification, so waiting agents wake without polling
+        self._update_version = 0
+        self._update_event = asyncio.Event()
+
         # Initialize database
         self._init_db()
 
@@ -140,6 +151,27 @@ class SQLiteQueue:
         conn.commit()
         conn.close()
 
+    def _notify_update(self) -> None:
+        """Wake every coroutine blocked in wait_for_update()"""
+        self._update_version += 1
+        event, self._update_event = self._update_event, asyncio.Event()
+        event.set()
+
+    @property
+    def update_version(self) -> int:
+        """Counter bumped on every message or termination written through this queue"""
+        return self._update_version
+
+    async def wait_for_update(self, after_version: int) -> int:
+        """Wait until update_version exceeds after_version and return the new version.
+
+        Only writes made through this instance are seen; callers should bound the
+        wait with a timeout to notice writes from other processes.
+        """
+        while self._update_version <= after_version:
+            await self._update_event.wait()
+        return self._update_version
+
     def _validate_message(self, sender: str, content: str) -> Tuple[str, str]:
         """Validate and normalize inputs"""
         sender_map = {
@@ -176,7 +208,7 @@ class SQLiteQueue:
             "content": content,
             "timestamp": datetime.now().isoformat(),
             "hash": hash_message(content),
-            "metadata": json.dumps(metadata or {}),
+            "metadata": _dumps(metadata or {}),
         }
 
         try:
@@ -231,6 +263,7 @@ class SQLiteQueue:
                         )
 
                     conn.commit()
+                    self._notify_update()
 
                     log_event(
                         self.logger,
@@ -252,6 +285,12 @@ class SQLiteQueue:
 
     async def get_context(self, max_messages: int = 10) -> List[Dict[str, Any]]:
         """Get recent conversation context"""
+        return await self.get_context_since(None, max_messages)
+
+    async def get_context_since(
+        self, after_id: Optional[int], max_messages: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Get up to max_messages of the newest messages with id > after_id, oldest first"""
         await asyncio.sleep(0)
 
         conn = sqlite3.connect(str(self.filepath))
@@ -259,7 +298,8 @@ class SQLiteQueue:
 
         try:
             rows = conn.execute(
-                "SELECT * FROM messages ORDER BY id DESC LIMIT ?", (max_messages,)
+                "SELECT * FROM messages WHERE id > ? ORDER BY id DESC LIMIT ?",
+                (after_id or 0, max_messages),
             ).fetchall()
 
             # convert rows into plain dicts (typing-friendly)
@@ -310,6 +350,22 @@ class SQLiteQueue:
         finally:
             conn.close()
 
+    async def get_turn_state(self) -> TurnState:
+        """Get termination flag and last sender in a single query"""
+        await asyncio.sleep(0)
+
+        conn = sqlite3.connect(str(self.filepath))
+        try:
+            terminated, last_sender = conn.execute(
+                """
+                SELECT (SELECT value FROM metadata WHERE key='terminated'),
+                       (SELECT sender FROM messages ORDER BY id DESC LIMIT 1)
+                """
+            ).fetchone()
+            return TurnState(str(terminated) == "1", last_sender)
+        finally:
+            conn.close()
+
     async def mark_terminated(self, reason: str) -> None:
         """Mark conversation as terminated"""
         await asyncio.sleep(0)
@@ -329,6 +385,7 @@ class SQLiteQueue:
                         (now,),
                     )
                     conn.commit()
+                    self._notify_update()
 
                     log_event(self.logger, "conversation_terminated", {"reason": reason})
                 finally:
@@ -456,7 +513,7 @@ class RedisQueue:
             "sender": sender,
             "content": content,
             "timestamp": datetime.now().isoformat(),
-            "metadata": json.dumps(metadata or {}),
+            "metadata": _dumps(metadata or {}),
         }
 
         msg_id = await self.r.xadd(f"{self.conv_id}:messages", msg)
@@ -474,7 +531,20 @@ class RedisQueue:
 
     async def get_context(self, max_messages: int = 10) -> List[Dict[str, Any]]:
         """Get recent messages from Redis stream"""
-        entries = await self.r.xrevrange(f"{self.conv_id}:messages", count=max_messages)
+        return await self.get_context_since(None, max_messages)
+
+    async def get_context_since(
+        self, after_id: Optional[str], max_messages: int = 10
+    ) -> List[Dict[str, Any]]:
+        """Get up to max_messages of the newest stream entries after after_id, oldest first"""
+        if after_id is None:
+            entries = await self.r.xrevrange(f"{self.conv_id}:messages", count=max_messages)
+        else:
+            # XREVRANGE bounds are inclusive; fetch one extra and drop after_id itself
+            entries = await self.r.xrevrange(
+                f"{self.conv_id}:messages", min=after_id, count=max_messages + 1
+            )
+            entries = [e for e in entries if e[0] != after_id][:max_messages]
         messages: List[Dict[str, Any]] = []
 
         for stream_id, fields in reversed(entries):
@@ -501,6 +571,15 @@ class RedisQueue:
         value = await self.r.get(f"{self.conv_id}:terminated")
         return str(value) == "1"
 
+    async def get_turn_state(self) -> TurnState:
+        """Get termination flag and last sender in one pipelined round-trip"""
+        pipe = self.r.pipeline(transaction=False)
+        pipe.get(f"{self.conv_id}:terminated")
+        pipe.xrevrange(f"{self.conv_id}:messages", count=1)
+        terminated, entries = await pipe.execute()
+        sender = entries[0][1].get("sender") if entries else None
+        return TurnState(str(terminated) == "1", str(sender) if sender is not None else None)
+
     async def mark_terminated(self, reason: str) -> None:
         """Mark conversation as terminated"""
         await self.r.set(f"{self.conv_id}:terminated", "1")
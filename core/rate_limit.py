@@ -0,0 +1,41 @@
+"""Process-wide rate-limit windows shared by agents v5.0"""
+
+import asyncio
+import time
+from typing import Dict, Tuple
+
+# (provider, model) -> monotonic time before which new calls should not start
+_next_allowed: Dict[Tuple[str, str], float] = {}
+
+
+def defer(provider: str, model: str, seconds: float) -> None:
+    """Hold off new calls to (provider, model) for the given number of seconds"""
+    key = (provider, model)
+    until = time.monotonic() + seconds
+    if until > _next_allowed.get(key, 0.0):
+        _next_allowed[key] = until
+
+
+def remaining(provider: str, model: str) -> float:
+    """Seconds left in the (provider, model) window, 0.0 if calls may start"""
+    until = _next_allowed.get((provider, model))
+    if until is None:
+        return 0.0
+    left = until - time.monotonic()
+    if left <= 0:
+        _next_allowed.pop((provider, model), None)
+        return 0.0
+    return left
+
+
+async def wait_if_needed(provider: str, model: str) -> float:
+    """Sleep out any active window for (provider, model); returns the seconds waited"""
+    left = remaining(provider, model)
+    if left > 0:
+        await asyncio.sleep(left)
+    return left
+
+
+def reset() -> None:
+    """Forget all windows (tests, or after reconfiguring providers)"""
+    _next_allowed.clear()
@@ -4,9 +4,6 @@ import logging
 import os
 
 from opentelemetry import trace
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +20,12 @@ def setup_tracing():
         return
 
     try:
+        # The SDK and OTLP exporter are only needed when tracing is on; importing
+        # them lazily keeps them off the startup path of every CLI and web process.
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
         # Create tracer provider
         provider = TracerProvider()
 
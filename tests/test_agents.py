@@ -1,14 +1,19 @@
 """Comprehensive agent tests for AI Conversation Platform v5.0 - FIXED"""
 
+import asyncio
+import gc
 import importlib.util
 import logging
+import weakref
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 # We patch 'agents.base.config' so we must import from agents.base
 from agents import ChatGPTAgent, ClaudeAgent
-from agents.base import CircuitBreaker
+from agents.base import CircuitBreaker, _client_cache, close_shared_clients
+
+HAS_LLM_GUARD = importlib.util.find_spec("llm_guard") is not None
 
 
 @pytest.fixture
@@ -70,6 +75,35 @@ class TestCircuitBreaker:
         # After timeout, should transition to HALF_OPEN when queried
         assert not cb.is_open()  # This triggers the transition logic
 
+    def test_circuit_breaker_half_open_admits_single_trial(self, logger):
+        """Only one caller passes in HALF_OPEN until the trial call reports back"""
+        cb = CircuitBreaker(
+            logger=logger,
+            provider_name="TestProvider",
+            failure_threshold=1,
+            timeout_seconds=60,
+        )
+        cb.record_failure()
+        cb.last_failure_time -= 61  # pretend the open timeout has elapsed
+
+        assert not cb.is_open()  # trial call admitted
+        assert cb.state == "HALF_OPEN"
+        assert cb.is_open()  # concurrent caller rejected
+
+        cb.record_success()
+        assert cb.state == "CLOSED"
+        assert not cb.is_open()
+
+    def test_circuit_breaker_closed_check_skips_clock(self, logger):
+        cb = CircuitBreaker(logger=logger, provider_name="TestProvider")
+        with patch("agents.base.time.monotonic") as clock:
+            assert not cb.is_open()
+        clock.assert_not_called()
+
+    def test_circuit_breaker_has_no_instance_dict(self, logger):
+        cb = CircuitBreaker(logger=logger, provider_name="TestProvider")
+        assert not hasattr(cb, "__dict__")
+
     def test_circuit_breaker_success_resets(self, logger):  # Added logger
         """Test successful call resets circuit breaker"""
         cb = CircuitBreaker(logger=logger, provider_name="TestProvider")  # Updated
@@ -91,9 +125,9 @@ class TestChatGPTAgent:
     async def test_chatgpt_initialization(self, mock_queue, logger):
         """Test ChatGPT agent initialization"""
         with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
-            # CRITICAL: Patch at the SOURCE of the import (openai.OpenAI)
+            # CRITICAL: Patch at the SOURCE of the import (openai.AsyncOpenAI)
             # NOT where it's used (agents.chatgpt.OpenAI doesn't exist)
-            with patch("openai.OpenAI"):
+            with patch("openai.AsyncOpenAI"):
                 agent = ChatGPTAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -111,10 +145,11 @@ class TestChatGPTAgent:
     async def test_chatgpt_api_call(self, mock_queue, logger):
         """Test ChatGPT API call"""
         with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
-            # CRITICAL: Patch at the SOURCE of the import (openai.OpenAI)
-            with patch("openai.OpenAI") as mock_openai:
+            # CRITICAL: Patch at the SOURCE of the import (openai.AsyncOpenAI)
+            with patch("openai.AsyncOpenAI") as mock_openai:
                 # Create a mock client
                 mock_client = MagicMock()
+                mock_client.chat.completions.create = AsyncMock()
                 mock_client.chat.completions.create.return_value = MagicMock(
                     choices=[MagicMock(message=MagicMock(content="Hello"))],
                     usage=MagicMock(total_tokens=10),
@@ -134,6 +169,91 @@ class TestChatGPTAgent:
                 assert tokens == 10
 
 
+class TestSharedClients:
+    """Agents of one provider on the same event loop share an SDK client"""
+
+    @pytest.mark.asyncio
+    async def test_same_provider_and_key_share_client(self, mock_queue, logger):
+        with patch("openai.AsyncOpenAI") as mock_openai:
+            mock_openai.side_effect = lambda **_: MagicMock()
+            a, b, c = (
+                ChatGPTAgent(
+                    api_key=key,
+                    queue=mock_queue,
+                    logger=logger,
+                    model="gpt-4o",
+                    topic="test",
+                    timeout_minutes=30,
+                )
+                for key in ("shared-key", "shared-key", "other-key")
+            )
+
+        assert a.client is b.client
+        assert a.client is not c.client
+        assert mock_openai.call_count == 2
+
+        for agent in (a, b, c):
+            await agent.aclose()
+
+    def test_finished_loop_leaves_no_cache_entry(self, mock_queue, logger):
+        clients = []
+
+        def make_client(**_):
+            client = MagicMock()
+            client.close = AsyncMock()
+            clients.append(client)
+            return client
+
+        async def conversation():
+            with patch("openai.AsyncOpenAI", side_effect=make_client):
+                a, b = (
+                    ChatGPTAgent(
+                        api_key="shared-key",
+                        queue=mock_queue,
+                        logger=logger,
+                        model="gpt-4o",
+                        topic="test",
+                        timeout_minutes=30,
+                    )
+                    for _ in range(2)
+                )
+            await a.aclose()
+            clients[0].close.assert_not_awaited()  # b still uses it
+            await b.aclose()
+            clients[0].close.assert_awaited_once()
+            return asyncio.get_running_loop()
+
+        loop = asyncio.run(conversation())
+        assert loop not in _client_cache
+        loop_ref = weakref.ref(loop)
+        del loop
+        gc.collect()
+        assert loop_ref() is None  # nothing pins the finished loop
+
+    def test_close_shared_clients_drops_unreleased_clients(self, mock_queue, logger):
+        client = MagicMock()
+        client.close = AsyncMock()
+
+        async def session():
+            with patch("openai.AsyncOpenAI", return_value=client):
+                agent = ChatGPTAgent(
+                    api_key="demo-key",
+                    queue=mock_queue,
+                    logger=logger,
+                    model="gpt-4o",
+                    topic="test",
+                    timeout_minutes=30,
+                )
+            await close_shared_clients()
+            await agent.aclose()  # releasing after the loop-wide close is a no-op
+            return asyncio.get_running_loop()
+
+        loop = asyncio.run(session())
+
+        client.close.assert_awaited_once()
+        assert loop not in _client_cache
+
+
 class TestClaudeAgent:
     """Test Claude agent"""
 
@@ -141,8 +261,8 @@ class TestClaudeAgent:
     async def test_claude_initialization(self, mock_queue, logger):
         """Test Claude agent initialization"""
         with patch.dict("os.environ", {"ANTHROPIC_API_KEY": "test-key"}):
-            # CRITICAL: Patch at the SOURCE of the import (anthropic.Anthropic)
-            with patch("anthropic.Anthropic"):
+            # CRITICAL: Patch at the SOURCE of the import (anthropic.AsyncAnthropic)
+            with patch("anthropic.AsyncAnthropic"):
                 agent = ClaudeAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -160,10 +280,11 @@ class TestClaudeAgent:
     async def test_claude_api_call(self, mock_queue, logger):
         """Test Claude API call"""
         with patch.dict("os.environ", {"ANTHROPIC_API_KEY": "test-key"}):
-            # CRITICAL: Patch at the SOURCE of the import (anthropic.Anthropic)
-            with patch("anthropic.Anthropic") as mock_anthropic:
+            # CRITICAL: Patch at the SOURCE of the import (anthropic.AsyncAnthropic)
+            with patch("anthropic.AsyncAnthropic") as mock_anthropic:
                 # Create a mock client
                 mock_client = MagicMock()
+                mock_client.messages.create = AsyncMock()
                 mock_client.messages.create.return_value = MagicMock(
                     content=[MagicMock(text="Hi from Claude")],
                     usage=MagicMock(input_tokens=5, output_tokens=6),
@@ -182,6 +303,49 @@ class TestClaudeAgent:
                 assert content == "Hi from Claude"
                 assert tokens == 11
 
+    @pytest.mark.asyncio
+    async def test_claude_prompt_caching_marks_last_message(self, mock_queue, logger):
+        """With ENABLE_PROMPT_CACHING the newest message carries a cache breakpoint."""
+        with (
+            patch("agents.claude.config.ENABLE_PROMPT_CACHING", True),
+            patch("anthropic.AsyncAnthropic") as mock_anthropic,
+        ):
+            mock_client = MagicMock()
+            mock_client.messages.create = AsyncMock(
+                return_value=MagicMock(
+                    content=[MagicMock(text="ok")],
+                    usage=MagicMock(
+                        input_tokens=5,
+                        output_tokens=6,
+                        cache_creation_input_tokens=0,
+                        cache_read_input_tokens=100,
+                    ),
+                )
+            )
+            mock_anthropic.return_value = mock_client
+            agent = ClaudeAgent(
+                api_key="cache-key",
+                queue=mock_queue,
+                logger=logger,
+                model="claude-3-opus-20240229",
+                topic="test",
+                timeout_minutes=30,
+            )
+            history = [
+                {"role": "user", "content": "hi"},
+                {"role": "assistant", "content": "hello"},
+                {"role": "user", "content": "go on"},
+            ]
+            _, tokens = await agent._call_api(history)
+
+        sent = mock_client.messages.create.await_args.kwargs["messages"]
+        assert sent[:2] == history[:2]
+        assert sent[2]["content"] == [
+            {"type": "text", "text": "go on", "cache_control": {"type": "ephemeral"}}
+        ]
+        assert history[2] == {"role": "user", "content": "go on"}  # caller's list untouched
+        assert tokens == 111
+
 
 class TestSimilarity:
     """Test similarity detection logic"""
@@ -189,7 +353,7 @@ class TestSimilarity:
     @pytest.mark.asyncio
     async def test_similarity_detection(self, mock_queue, logger):
         with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
-            with patch("openai.OpenAI"):
+            with patch("openai.AsyncOpenAI"):
                 agent = ChatGPTAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -228,7 +392,7 @@ class TestShouldRespond:
     @pytest.mark.asyncio
     async def test_should_respond(self, mock_queue, logger):
         with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key"}):
-            with patch("openai.OpenAI"):
+            with patch("openai.AsyncOpenAI"):
                 agent = ChatGPTAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -252,13 +416,11 @@ class TestAgentSecurity:
     """Test agent security features"""
 
     @pytest.mark.asyncio
+    @pytest.mark.skipif(not HAS_LLM_GUARD, reason="llm-guard not installed")
     async def test_llm_guard_integration(self, mock_queue, logger):
         """Test LLM Guard integration (if available)"""
         with patch.dict("os.environ", {"OPENAI_API_KEY": "test-key", "ENABLE_LLM_GUARD": "true"}):
-            if importlib.util.find_spec("llm_guard") is None:
-                pytest.skip("llm-guard not installed")
-
-            with patch("openai.OpenAI"):
+            with patch("openai.AsyncOpenAI"):
                 agent = ChatGPTAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -1,11 +1,13 @@
 """Additional agent tests for Gemini, Grok, and Perplexity."""
 
 import logging
+import threading
 from unittest.mock import AsyncMock, patch
 
 import pytest
 
 from agents.base import BaseAgent, CircuitBreaker
+from core.queue import SQLiteQueue
 
 
 @pytest.fixture
@@ -31,7 +33,7 @@ class DummyOpenAIClient:
     def __init__(self, *args, **kwargs):
         self.chat = type("Chat", (), {"completions": type("Comps", (), {})()})()
 
-        def _create(**_kwargs):
+        async def _create(**_kwargs):
             usage = type("Usage", (), {"total_tokens": 50})()
             choice = type(
                 "Choice",
@@ -51,12 +53,24 @@ class DummyGenAIModel:
 
     def start_chat(self, history=None):  # noqa: ARG002
         class Chat:
-            def send_message(self, last):  # noqa: ARG002
+            async def send_message_async(self, last):  # noqa: ARG002
                 return type("Resp", (), {"text": "Gemini says hi"})()
 
         return Chat()
 
 
+class DummyGenAIModelWithUsage(DummyGenAIModel):
+    """Gemini model whose responses carry usage_metadata."""
+
+    def start_chat(self, history=None):  # noqa: ARG002
+        class Chat:
+            async def send_message_async(self, last):  # noqa: ARG002
+                usage = type("Usage", (), {"total_token_count": 42})()
+                return type("Resp", (), {"text": "Gemini says hi", "usage_metadata": usage})()
+
+        return Chat()
+
+
 class TestGrokAgent:
     """Test Grok agent."""
 
@@ -66,8 +80,8 @@ class TestGrokAgent:
         from agents import GrokAgent
 
         with patch.dict("os.environ", {"XAI_API_KEY": "test-key"}):
-            # Patch at source: openai.OpenAI
-            with patch("openai.OpenAI", DummyOpenAIClient):
+            # Patch at source: openai.AsyncOpenAI
+            with patch("openai.AsyncOpenAI", DummyOpenAIClient):
                 agent = GrokAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -87,8 +101,8 @@ class TestGrokAgent:
         from agents import GrokAgent
 
         with patch.dict("os.environ", {"XAI_API_KEY": "test-key"}):
-            # Patch at source: openai.OpenAI
-            with patch("openai.OpenAI", DummyOpenAIClient):
+            # Patch at source: openai.AsyncOpenAI
+            with patch("openai.AsyncOpenAI", DummyOpenAIClient):
                 agent = GrokAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -113,8 +127,8 @@ class TestPerplexityAgent:
         from agents import PerplexityAgent
 
         with patch.dict("os.environ", {"PERPLEXITY_API_KEY": "test-key"}):
-            # Patch at source: openai.OpenAI
-            with patch("openai.OpenAI", DummyOpenAIClient):
+            # Patch at source: openai.AsyncOpenAI
+            with patch("openai.AsyncOpenAI", DummyOpenAIClient):
                 agent = PerplexityAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -134,8 +148,8 @@ class TestPerplexityAgent:
         from agents import PerplexityAgent
 
         with patch.dict("os.environ", {"PERPLEXITY_API_KEY": "test-key"}):
-            # Patch at source: openai.OpenAI
-            with patch("openai.OpenAI", DummyOpenAIClient):
+            # Patch at source: openai.AsyncOpenAI
+            with patch("openai.AsyncOpenAI", DummyOpenAIClient):
                 agent = PerplexityAgent(
                     api_key="test-key",
                     queue=mock_queue,
@@ -199,6 +213,24 @@ class TestGeminiAgent:
                     assert "gemini" in content.lower()
                     assert tokens >= 0
 
+    @pytest.mark.asyncio
+    async def test_gemini_uses_reported_token_count(self, mock_queue, logger):
+        """usage_metadata.total_token_count replaces the length estimate when present."""
+        from agents import GeminiAgent
+
+        with patch("google.generativeai.configure"):
+            with patch("google.generativeai.GenerativeModel", DummyGenAIModelWithUsage):
+                agent = GeminiAgent(
+                    api_key="test-key",
+                    queue=mock_queue,
+                    logger=logger,
+                    model="gemini-1.5-pro",
+                    topic="test",
+                    timeout_minutes=30,
+                )
+                _, tokens = await agent._call_api([{"role": "user", "content": "hi"}])
+        assert tokens == 42
+
 
 class MockQueue:
     async def add_message(self, *args, **kwargs):  # noqa: ARG002
@@ -274,3 +306,37 @@ async def test_agent_in_executor_with_args():
 
     result = await agent._in_executor(add, 2, 3)
     assert result == 5
+
+
+@pytest.mark.asyncio
+async def test_agent_in_executor_uses_shared_pool_with_kwargs():
+    agent = TestAgentExtended()
+
+    def where(*, tag):
+        return tag, threading.current_thread().name
+
+    tag, thread_name = await agent._in_executor(where, tag="x")
+    assert tag == "x"
+    assert thread_name.startswith("agent-io")
+
+
+@pytest.mark.asyncio
+async def test_build_messages_keeps_rolling_window(tmp_path, monkeypatch):
+    monkeypatch.setattr("agents.base.config.MAX_CONTEXT_MSGS", 2)
+    queue = SQLiteQueue(tmp_path / "conv.db", logging.getLogger("test"))
+    agent = TestAgentExtended(queue=queue, agent_name="Me")
+
+    await queue.add_message("Me", "one")
+    await queue.add_message("Other", "two")
+    assert await agent._build_messages() == [
+        {"role": "assistant", "content": "one"},
+        {"role": "user", "content": "two"},
+    ]
+
+    await queue.add_message("Me", "three")
+    with patch.object(queue, "get_context", side_effect=AssertionError("full re-read")):
+        messages = await agent._build_messages()
+    assert messages == [
+        {"role": "user", "content": "two"},
+        {"role": "assistant", "content": "three"},
+    ]
@@ -1,7 +1,10 @@
 # Minimal tests to increase coverage for agents/base.py
 import logging
+from datetime import datetime, timedelta
 from unittest.mock import MagicMock, patch
 
+import pytest
+
 from agents import base
 
 
@@ -85,7 +88,16 @@ def test_agent_recent_responses():
     agent = DummyAgent()
     agent.recent_responses.append("response1")
     agent.recent_responses.append("response2")
-    assert len(agent.recent_responses) == 2
+    assert list(agent.recent_responses) == ["response2"]
+
+
+def test_agent_timeout_uses_start_time():
+    agent = DummyAgent()
+    assert agent._is_timeout() is False
+    agent.start_time = datetime.now() - timedelta(minutes=6)
+    assert agent._is_timeout() is True
+    agent.start_time = datetime.now()
+    assert agent._is_timeout() is False
 
 
 def test_agent_circuit_breaker_half_open():
@@ -142,3 +154,40 @@ def test_agent_scan_output_with_llm_guard():
 
     result = agent._scan_output("problematic output")
     assert result == "sanitized output"
+
+
+def test_turn_metadata_to_dict_matches_asdict():
+    from dataclasses import asdict
+
+    meta = base.TurnMetadata(model="m", tokens=3, response_time=0.5, turn=2)
+    assert meta.to_dict() == asdict(meta)
+
+
+def test_turn_metadata_is_immutable_and_slotted():
+    from dataclasses import FrozenInstanceError
+
+    meta = base.TurnMetadata(model="m", tokens=3, response_time=0.5, turn=2)
+    assert not hasattr(meta, "__dict__")
+    with pytest.raises(FrozenInstanceError):
+        meta.tokens = 4  # type: ignore[misc]
+
+
+def test_classify_error_kinds():
+    class RateLimitError(Exception):
+        status_code = 429
+
+    assert base._classify_error(Exception("401 Unauthorized")) == "config"
+    assert base._classify_error(TimeoutError("slow")) == "timeout"
+    assert base._classify_error(RateLimitError("slow down")) == "rate_limit"
+    assert base._classify_error(Exception("Circuit breaker OPEN. Retry in 5s")) == "circuit_breaker"
+    assert base._classify_error(Exception("boom")) == "api"
+
+
+def test_classify_error_prefers_rate_limit_over_timeout():
+    class RateLimitError(Exception):
+        status_code = 429
+
+    message = "Rate limit exceeded, retry after timeout"
+    assert base._classify_error(RateLimitError(message)) == "rate_limit"
+    assert base._classify_error(Exception(message)) == "rate_limit"
+    assert base._classify_error(Exception("rate_limit_error: request timeout")) == "rate_limit"
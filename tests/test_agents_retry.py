@@ -6,10 +6,10 @@ import pytest
 
 # Provider patch targets used by your concrete agents
 PROVIDER_PATCH = {
-    "claude": "anthropic.Anthropic",
-    "chatgpt": "openai.OpenAI",
-    "grok": "openai.OpenAI",  # xAI Grok via OpenAI-compatible client
-    "perplexity": "openai.OpenAI",  # Perplexity via OpenAI-compatible client
+    "claude": "anthropic.AsyncAnthropic",
+    "chatgpt": "openai.AsyncOpenAI",
+    "grok": "openai.AsyncOpenAI",  # xAI Grok via OpenAI-compatible client
+    "perplexity": "openai.AsyncOpenAI",  # Perplexity via OpenAI-compatible client
     "gemini": "google.generativeai.GenerativeModel",
 }
 
@@ -52,6 +52,14 @@ def success_for(agent_name: str, text: str = "ok"):
         )
 
 
+def async_client_mock():
+    """Client mock whose request methods are awaitable, like the SDKs' async clients."""
+    client = MagicMock()
+    client.messages.create = AsyncMock()
+    client.chat.completions.create = AsyncMock()
+    return client
+
+
 @pytest.mark.asyncio
 @pytest.mark.parametrize("agent_name", AGENTS)
 async def test_retry_on_timeout(agent_name):
@@ -60,7 +68,7 @@ async def test_retry_on_timeout(agent_name):
     AgentClass = getattr(module, AGENT_CLASSES[agent_name])
     patch_path = PROVIDER_PATCH[agent_name]
 
-    mock_client = MagicMock()
+    mock_client = async_client_mock()
 
     # --- THIS IS THE FIX ---
     # Raise a standard TimeoutError. Our base.py logic will catch
@@ -70,7 +78,8 @@ async def test_retry_on_timeout(agent_name):
 
     if agent_name == "gemini":
         mock_chat = MagicMock()
-        mock_chat.send_message.side_effect = [timeout_exc, success_for(agent_name, "success")]
+        mock_chat.send_message_async = AsyncMock()
+        mock_chat.send_message_async.side_effect = [timeout_exc, success_for(agent_name, "success")]
         mock_client.start_chat.return_value = mock_chat
     elif agent_name == "claude":
         mock_client.messages.create.side_effect = [timeout_exc, success_for(agent_name, "success")]
@@ -107,7 +116,7 @@ async def test_retry_on_timeout(agent_name):
 
         # Assert we retried after timeout and then succeeded
         if agent_name == "gemini":
-            assert mock_chat.send_message.call_count == 2
+            assert mock_chat.send_message_async.call_count == 2
         elif agent_name == "claude":
             assert mock_client.messages.create.call_count == 2
         else:
@@ -124,10 +133,14 @@ async def test_429_backoff_respects_retry_after(agent_name):
     AgentClass = getattr(module, AGENT_CLASSES[agent_name])
     patch_path = PROVIDER_PATCH[agent_name]
 
-    mock_client = MagicMock()
+    mock_client = async_client_mock()
     if agent_name == "gemini":
         mock_chat = MagicMock()
-        mock_chat.send_message.side_effect = [RateLimitError(0.1), success_for(agent_name, "ok")]
+        mock_chat.send_message_async = AsyncMock()
+        mock_chat.send_message_async.side_effect = [
+            RateLimitError(0.1),
+            success_for(agent_name, "ok"),
+        ]
         mock_client.start_chat.return_value = mock_chat
     elif agent_name == "claude":
         mock_client.messages.create.side_effect = [
@@ -171,7 +184,7 @@ async def test_429_backoff_respects_retry_after(agent_name):
         queue.add_message.assert_awaited_with(agent.agent_name, "ok", ANY)
 
         if agent_name == "gemini":
-            assert mock_chat.send_message.call_count == 2
+            assert mock_chat.send_message_async.call_count == 2
         elif agent_name == "claude":
             assert mock_client.messages.create.call_count == 2
         else:
@@ -186,7 +199,7 @@ async def test_circuit_breaker_skips_when_open(agent_name):
     AgentClass = getattr(module, AGENT_CLASSES[agent_name])
     patch_path = PROVIDER_PATCH[agent_name]
 
-    mock_client = MagicMock()
+    mock_client = async_client_mock()
     patches_to_apply = [
         patch(patch_path, return_value=mock_client),
         patch("agents.base.CircuitBreaker.is_open", return_value=True),
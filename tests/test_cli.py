@@ -30,6 +30,9 @@ def stub_agent(name):
         async def run(self, max_turns: int, partner_name: str):
             return None
 
+        async def aclose(self):
+            return None
+
     return _A()
 
 
@@ -162,6 +165,18 @@ def test_check_configuration_messages(capsys):
         assert "only 1 agent configured" in out
 
 
+def test_show_available_agents_lists_missing_env_keys(capsys):
+    with patch("cli.start_conversation.detect_configured_agents", return_value=["claude"]):
+        from cli.start_conversation import ConversationStarter
+
+        starter = ConversationStarter(args=None)
+        starter._show_available_agents()
+
+        out = capsys.readouterr().out
+        assert "UNAVAILABLE AGENTS" in out
+        assert "chatgpt - Set OPENAI_API_KEY" in out
+
+
 # -------- selecting agents --------
 def test_select_agent_from_cli_and_invalid_exit():
     with patch(
@@ -304,6 +319,7 @@ def test_main_parses_args_and_calls_asyncio_run():
     with (
         patch.object(sys, "argv", argv),
         patch("cli.start_conversation.async_main", side_effect=lambda args: asyncio.sleep(0)),
+        patch("cli.start_conversation._uvloop_run", None),
         patch("asyncio.run", side_effect=fake_run),
     ):
         from cli.start_conversation import main
@@ -312,6 +328,22 @@ def test_main_parses_args_and_calls_asyncio_run():
         assert called.get("ran", False)
 
 
+def test_main_prefers_uvloop_when_installed():
+    fake_uvloop_run = MagicMock(side_effect=lambda coro: coro.close())
+
+    with (
+        patch.object(sys, "argv", ["aic-start"]),
+        patch("cli.start_conversation._uvloop_run", fake_uvloop_run),
+        patch("asyncio.run") as mock_asyncio_run,
+    ):
+        from cli.start_conversation import main
+
+        main()
+
+    fake_uvloop_run.assert_called_once()
+    mock_asyncio_run.assert_not_called()
+
+
 def test_main_argparse_error_exits_nonzero():
     # Pass invalid value for --turns so argparse should exit with nonzero code
     def _exit_side_effect(code=0):
@@ -332,6 +364,7 @@ def test_main_argparse_error_exits_nonzero():
 def test_main_handles_keyboard_interrupt():
     """Test that main() handles KeyboardInterrupt gracefully and exits with code 0."""
     with (
+        patch("cli.start_conversation._uvloop_run", None),
         patch("asyncio.run", side_effect=KeyboardInterrupt),
         patch.object(sys, "exit") as mock_exit,
     ):
@@ -1,4 +1,25 @@
-from core.common import add_jitter, mask_api_key, sanitize_content, simple_similarity
+import json
+import logging
+import sys
+import time
+from unittest.mock import MagicMock, patch
+
+from core.common import (
+    _dumps,
+    _get_encoding,
+    add_jitter,
+    estimate_tokens,
+    flush_console,
+    full_jitter,
+    get_console_logger,
+    log_event,
+    mask_api_key,
+    sanitize_content,
+    setup_logging,
+    shingle_set,
+    shingle_similarity,
+    simple_similarity,
+)
 
 
 def test_mask_api_key():
@@ -7,16 +28,128 @@ def test_mask_api_key():
     assert "[ANTHROPIC_KEY]" in m or "[OPENAI_KEY]" in m
 
 
+def test_mask_api_key_masks_key_glued_to_long_token():
+    # Patterns apply one after another; a single alternation would let the long
+    # token swallow the "sk" prefix and leave the key body in the clear.
+    key_body = "b" * 20
+    m = mask_api_key("a" * 40 + "sk-" + key_body)
+    assert key_body not in m
+
+
 def test_sanitize_content():
     val = "<div><script>evil()</script>ok</div>"
     cleaned = sanitize_content(val)
     assert "[FILTERED]" in cleaned
 
 
+def test_sanitize_content_filters_every_pattern_in_one_pass():
+    val = "<script>x</script> javascript:alert(1) onclick = f() DROP TABLE t; delete  from u"
+    assert sanitize_content(val) == (
+        "[FILTERED] [FILTERED]alert(1) [FILTERED] f() [FILTERED] t; [FILTERED] u"
+    )
+
+
 def test_simple_similarity_range():
     v = simple_similarity("hello world", "hello brave new world")
     assert 0.0 <= v <= 1.0
 
 
+def test_shingle_set_uses_word_tuples():
+    assert shingle_set("A b c d") == {("a", "b", "c"), ("b", "c", "d")}
+    # Shorter than n words: one shingle of all the words, whitespace-normalised
+    assert shingle_set("hi  there") == shingle_set("hi there") == {("hi", "there")}
+
+
+def test_shingle_similarity_matches_simple_similarity():
+    a, b = "the quick brown fox jumps", "the quick brown dog jumps"
+    assert shingle_similarity(shingle_set(a), shingle_set(b)) == simple_similarity(a, b)
+
+
 def test_add_jitter_nonnegative():
     assert add_jitter(1.0) > 0.0
+
+
+def test_estimate_tokens_scales_with_length():
+    assert estimate_tokens("") == 0
+    short, long = estimate_tokens("hello world"), estimate_tokens("hello world " * 50)
+    assert 0 < short < long
+
+
+def test_estimate_tokens_loads_encoding_on_first_use_only():
+    fake_tiktoken = MagicMock()
+    fake_tiktoken.get_encoding.return_value.encode.side_effect = lambda t, **_: t.split()
+    _get_encoding.cache_clear()
+    try:
+        with patch.dict(sys.modules, {"tiktoken": fake_tiktoken}):
+            fake_tiktoken.get_encoding.assert_not_called()
+            assert estimate_tokens("a b c") == 3
+            assert estimate_tokens("d e") == 2
+        fake_tiktoken.get_encoding.assert_called_once_with("cl100k_base")
+
+        _get_encoding.cache_clear()
+        with patch.dict(sys.modules, {"tiktoken": None}):  # not installed
+            assert estimate_tokens("x" * 8) == 2
+    finally:
+        _get_encoding.cache_clear()
+
+
+def test_full_jitter_stays_within_backoff():
+    values = [full_jitter(2.0) for _ in range(200)]
+    assert all(0.1 <= v <= 2.0 for v in values)
+    assert max(values) - min(values) > 0.5  # spread over the range, not clustered
+
+
+def test_dumps_round_trips_values_orjson_rejects():
+    payload = {"big": 2**70, "text": "ok"}
+    assert json.loads(_dumps(payload)) == payload
+
+
+def test_log_event_skips_disabled_level():
+    logger = MagicMock(spec=logging.Logger)
+    logger.isEnabledFor.return_value = False
+    log_event(logger, "turn", {"x": 1})
+    logger.info.assert_not_called()
+
+
+def test_console_logger_writes_to_stdout_off_thread(capsys):
+    console = get_console_logger()
+    assert get_console_logger() is console
+    console.info("hello from the listener")
+
+    deadline = time.monotonic() + 2
+    out = ""
+    while "hello from the listener" not in out and time.monotonic() < deadline:
+        time.sleep(0.01)
+        out += capsys.readouterr().out
+    assert "hello from the listener" in out
+
+
+def test_flush_console_waits_for_queued_lines(capsys):
+    console = get_console_logger()
+    for i in range(50):
+        console.info(f"queued line {i}")
+
+    flush_console()
+
+    out = capsys.readouterr().out
+    assert [line for line in out.splitlines() if line.startswith("queued line")] == [
+        f"queued line {i}" for i in range(50)
+    ]
+
+
+def test_setup_logging_reuses_configured_logger(tmp_path):
+    first = setup_logging("reuse_test", str(tmp_path / "a"))
+    try:
+        handlers = list(first.handlers)
+        assert setup_logging("reuse_test", str(tmp_path / "a")).handlers == handlers
+        # Nothing is written yet, so the rotating file has not been opened
+        assert not (tmp_path / "a" / "reuse_test.jsonl").exists()
+
+        # A different directory reconfigures and closes the old file handler
+        moved = setup_logging("reuse_test", str(tmp_path / "b"))
+        assert moved.handlers != handlers
+        assert handlers[0].stream is None
+    finally:
+        for h in list(first.handlers):
+            first.removeHandler(h)
+            h.close()
@@ -3,7 +3,7 @@ import logging
 import os
 import sys
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -67,6 +67,7 @@ async def test_real_agent_run_loop(temp_db, logger, caplog):
 
     # OpenAI (Chat Completions style)
     mock_openai_client = MagicMock()
+    mock_openai_client.chat.completions.create = AsyncMock()
     mock_openai_client.chat.completions.create.return_value = MagicMock(
         choices=[MagicMock(message=MagicMock(content=f"Hello from ChatGPT! {TERMINATION_TOKEN}"))],
         usage=MagicMock(total_tokens=10),
@@ -74,6 +75,7 @@ async def test_real_agent_run_loop(temp_db, logger, caplog):
 
     # Anthropic (Messages API shape)
     mock_anthropic_client = MagicMock()
+    mock_anthropic_client.messages.create = AsyncMock()
     mock_anthropic_client.messages.create.return_value = MagicMock(
         content=[MagicMock(text="Hi from Claude!")],
         usage=MagicMock(input_tokens=5, output_tokens=6),
@@ -86,8 +88,8 @@ async def test_real_agent_run_loop(temp_db, logger, caplog):
     # Therefore, we must patch both at their original source.
     #
     with (
-        patch("openai.OpenAI", return_value=mock_openai_client),
-        patch("anthropic.Anthropic", return_value=mock_anthropic_client),
+        patch("openai.AsyncOpenAI", return_value=mock_openai_client),
+        patch("anthropic.AsyncAnthropic", return_value=mock_anthropic_client),
         patch.dict(
             os.environ,
             {"OPENAI_API_KEY": "fake-key", "ANTHROPIC_API_KEY": "fake-key"},
@@ -0,0 +1,47 @@
+import json
+from unittest.mock import MagicMock
+
+import pytest
+
+from core.guard_client import RemoteGuardScanner
+
+
+def _http(status=200, payload=None):
+    http = MagicMock()
+    http.request.return_value = MagicMock(status=status, data=json.dumps(payload or {}).encode())
+    return http
+
+
+def test_prompt_scan_posts_prompt_and_returns_triple():
+    http = _http(
+        payload={
+            "sanitized_prompt": "hi",
+            "is_valid": False,
+            "scanners": {"PromptInjection": 0.9, "Toxicity": 0.1},
+        }
+    )
+    scanner = RemoteGuardScanner("http://guard:8000/", "prompt", token="t0k", http=http)  # noqa: S106
+
+    assert scanner.scan("", "hi") == ("hi", False, 0.9)
+
+    method, url = http.request.call_args.args
+    kwargs = http.request.call_args.kwargs
+    assert (method, url) == ("POST", "http://guard:8000/analyze/prompt")
+    assert json.loads(kwargs["body"]) == {"prompt": "hi"}
+    assert kwargs["headers"]["Authorization"] == "Bearer t0k"
+
+
+def test_output_scan_sends_prompt_and_output():
+    http = _http(payload={"sanitized_output": "ok", "is_valid": True, "scanners": {}})
+    scanner = RemoteGuardScanner("http://guard:8000", "output", http=http)
+
+    assert scanner.scan("question", "ok") == ("ok", True, 0.0)
+    body = json.loads(http.request.call_args.kwargs["body"])
+    assert body == {"prompt": "question", "output": "ok"}
+    assert "Authorization" not in http.request.call_args.kwargs["headers"]
+
+
+def test_http_error_raises():
+    scanner = RemoteGuardScanner("http://guard:8000", "prompt", http=_http(status=503))
+    with pytest.raises(RuntimeError, match="503"):
+        scanner.scan("", "hi")
@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+import pytest
+
+from core.llm_cache import ResponseCache
+
+
+def test_make_key_is_order_independent_for_dicts():
+    a = ResponseCache.make_key("ChatGPT", [{"role": "user", "content": "hi"}])
+    b = ResponseCache.make_key("ChatGPT", [{"content": "hi", "role": "user"}])
+    assert a == b
+    assert a != ResponseCache.make_key("Claude", [{"role": "user", "content": "hi"}])
+
+
+def test_entries_expire_and_evict_least_recent():
+    cache = ResponseCache(maxsize=2, ttl_seconds=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1  # refreshes "a"
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    expired = ResponseCache(maxsize=2, ttl_seconds=0)
+    expired.put("a", 1)
+    assert expired.get("a") is None
+
+
+@pytest.mark.asyncio
+async def test_get_or_call_coalesces_concurrent_misses():
+    cache = ResponseCache(maxsize=8, ttl_seconds=60)
+    calls = 0
+
+    async def call():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ("reply", 3)
+
+    results = await asyncio.gather(*(cache.get_or_call("k", call) for _ in range(5)))
+    assert results == [("reply", 3)] * 5
+    assert calls == 1
+    assert await cache.get_or_call("k", call) == ("reply", 3)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_get_or_call_does_not_cache_failures():
+    cache = ResponseCache(maxsize=8, ttl_seconds=60)
+
+    async def boom():
+        raise TimeoutError("slow")
+
+    with pytest.raises(TimeoutError):
+        await cache.get_or_call("k", boom)
+    assert cache.get("k") is None
+
+
+def test_get_or_call_across_loops_in_threads():
+    """Sessions on separate threads and loops missing the same key must not share futures."""
+    cache = ResponseCache(maxsize=8, ttl_seconds=60)
+    both_in_flight = threading.Barrier(2)
+    results, errors = [], []
+
+    async def call():
+        await asyncio.to_thread(both_in_flight.wait, 5)
+        return ("reply", 3)
+
+    def session():
+        try:
+            results.append(asyncio.run(cache.get_or_call("k", call)))
+        except Exception as e:  # surfaced below; a thread would swallow it
+            errors.append(e)
+
+    threads = [threading.Thread(target=session) for _ in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(10)
+
+    assert errors == []
+    assert results == [("reply", 3), ("reply", 3)]
+    assert cache.get("k") == ("reply", 3)
@@ -1,5 +1,8 @@
 # Tests for provider initialization to cover lines 27-30
 import logging
+import subprocess
+import sys
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
@@ -19,7 +22,7 @@ async def test_chatgpt_with_valid_key(mock_queue):
     """Test ChatGPT initialization with valid key"""
     from agents.chatgpt import ChatGPTAgent
 
-    with patch("openai.OpenAI"):
+    with patch("openai.AsyncOpenAI"):
         agent = ChatGPTAgent(
             api_key="test-key",
             queue=mock_queue,
@@ -36,7 +39,7 @@ async def test_claude_with_valid_key(mock_queue):
     """Test Claude initialization with valid key"""
     from agents.claude import ClaudeAgent
 
-    with patch("anthropic.Anthropic"):
+    with patch("anthropic.AsyncAnthropic"):
         agent = ClaudeAgent(
             api_key="test-key",
             queue=mock_queue,
@@ -72,7 +75,7 @@ async def test_grok_with_valid_key(mock_queue):
     """Test Grok initialization with valid key"""
     from agents.grok import GrokAgent
 
-    with patch("openai.OpenAI"):
+    with patch("openai.AsyncOpenAI"):
         agent = GrokAgent(
             api_key="test-key",
             queue=mock_queue,
@@ -89,7 +92,7 @@ async def test_perplexity_with_valid_key(mock_queue):
     """Test Perplexity initialization with valid key"""
     from agents.perplexity import PerplexityAgent
 
-    with patch("openai.OpenAI"):
+    with patch("openai.AsyncOpenAI"):
         agent = PerplexityAgent(
             api_key="test-key",
             queue=mock_queue,
@@ -99,3 +102,51 @@ async def test_perplexity_with_valid_key(mock_queue):
             timeout_minutes=5,
         )
         assert agent.client is not None
+
+
+def test_package_import_does_not_load_providers():
+    """Importing agents and querying the registry must not load any provider or SDK."""
+    code = (
+        "import sys, agents; "
+        "agents.list_available_agents(); agents.detect_configured_agents(); "
+        "agents.get_agent_info('claude'); "
+        "loaded = [m for m in ('agents.chatgpt', 'agents.claude', 'agents.gemini', "
+        "'agents.grok', 'agents.perplexity', 'openai', 'anthropic') if m in sys.modules]; "
+        "print(','.join(loaded))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == ""
+
+
+def test_lazy_agent_symbols_listed_in_dir():
+    """Lazy agent classes are discoverable before first access."""
+    import agents
+
+    assert {"ChatGPTAgent", "ClaudeAgent", "GeminiAgent"} <= set(dir(agents))
+
+
+def test_loaded_agent_class_is_cached_on_package():
+    """Classes resolved by the factory are stored as real package attributes."""
+    import agents
+    from agents import _load_class
+
+    cls = _load_class("GrokAgent")
+    assert vars(agents)["GrokAgent"] is cls
+    assert _load_class("GrokAgent") is cls
+
+
+def test_every_exported_name_resolves():
+    """The single lazy package init exposes every name it declares in __all__."""
+    import agents
+    from agents.base import BaseAgent
+
+    for name in agents.__all__:
+        obj = getattr(agents, name)
+        if name.endswith("Agent") and name != "BaseAgent":
+            assert issubclass(obj, BaseAgent)
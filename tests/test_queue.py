@@ -164,6 +164,40 @@ class TestSQLiteQueueBasic:
         last = await queue.get_last_sender()
         assert last == "ChatGPT"
 
+    @pytest.mark.asyncio
+    async def test_get_context_since_returns_only_newer_messages(self, temp_db, logger):
+        queue = SQLiteQueue(temp_db, logger)
+        first = await queue.add_message("Claude", "one")
+        await queue.add_message("ChatGPT", "two")
+        await queue.add_message("Claude", "three")
+
+        ctx = await queue.get_context_since(first["id"], 10)
+        assert [m["content"] for m in ctx] == ["two", "three"]
+        assert await queue.get_context_since(ctx[-1]["id"], 10) == []
+        assert [m["content"] for m in await queue.get_context_since(None, 1)] == ["three"]
+
+    @pytest.mark.asyncio
+    async def test_get_turn_state(self, temp_db, logger):
+        queue = SQLiteQueue(temp_db, logger)
+        assert await queue.get_turn_state() == (False, None)
+
+        await queue.add_message("Claude", "Hello")
+        await queue.mark_terminated("done")
+        assert await queue.get_turn_state() == (True, "Claude")
+
+    @pytest.mark.asyncio
+    async def test_wait_for_update_wakes_on_new_message(self, temp_db, logger):
+        queue = SQLiteQueue(temp_db, logger)
+        seen = queue.update_version
+        waiter = asyncio.create_task(queue.wait_for_update(seen))
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        await queue.add_message("Claude", "Hello")
+        assert await asyncio.wait_for(waiter, timeout=1) == seen + 1
+        # An update that already happened is returned immediately
+        assert await queue.wait_for_update(seen) == seen + 1
+
     @pytest.mark.asyncio
     async def test_termination(self, temp_db, logger):
         """Test conversation termination"""
@@ -449,6 +483,16 @@ class TestRedisQueue:
             assert messages[1]["sender"] == "Agent1"
             assert messages[1]["metadata"]["tokens"] == 20
 
+    @pytest.mark.asyncio
+    async def test_get_turn_state_uses_one_pipeline(self, logger, mock_redis):
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(return_value=["1", [("1-0", {"sender": "Agent1"})]])
+        mock_redis.pipeline = MagicMock(return_value=pipe)
+        with patch("redis.asyncio.from_url", return_value=mock_redis):
+            queue = RedisQueue("redis://localhost:6379/0", logger)
+            assert await queue.get_turn_state() == (True, "Agent1")
+        pipe.execute.assert_awaited_once()
+
     @pytest.mark.asyncio
     async def test_get_last_sender(self, logger, mock_redis):
         """Test getting last sender from Redis"""
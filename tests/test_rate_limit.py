@@ -0,0 +1,38 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from core import rate_limit
+
+
+@pytest.fixture(autouse=True)
+def clean_windows():
+    rate_limit.reset()
+    yield
+    rate_limit.reset()
+
+
+def test_defer_keeps_the_longest_window_per_provider_model():
+    rate_limit.defer("ChatGPT", "gpt-4o", 30)
+    rate_limit.defer("ChatGPT", "gpt-4o", 5)  # shorter window does not shrink it
+
+    assert 25 < rate_limit.remaining("ChatGPT", "gpt-4o") <= 30
+    assert rate_limit.remaining("ChatGPT", "gpt-4o-mini") == 0.0
+    assert rate_limit.remaining("Claude", "gpt-4o") == 0.0
+
+
+def test_expired_window_is_dropped():
+    rate_limit.defer("Claude", "m", 0)
+    assert rate_limit.remaining("Claude", "m") == 0.0
+    assert ("Claude", "m") not in rate_limit._next_allowed
+
+
+@pytest.mark.asyncio
+async def test_wait_if_needed_sleeps_out_the_window():
+    rate_limit.defer("Grok", "m", 10)
+    with patch("asyncio.sleep", new_callable=AsyncMock) as sleep:
+        waited = await rate_limit.wait_if_needed("Grok", "m")
+        assert await rate_limit.wait_if_needed("Grok", "other") == 0.0
+
+    sleep.assert_awaited_once()
+    assert 9 < waited <= 10
@@ -13,9 +13,9 @@ def test_setup_tracing_runs():
 def test_setup_tracing_with_endpoint():
     # Test with OTEL endpoint set
     with patch.dict(os.environ, {"OTEL_EXPORTER_OTLP_ENDPOINT": "http://localhost:4318"}):
-        with patch("core.tracing.TracerProvider"):
-            with patch("core.tracing.OTLPSpanExporter"):
-                with patch("core.tracing.BatchSpanProcessor"):
+        with patch("opentelemetry.sdk.trace.TracerProvider"):
+            with patch("opentelemetry.exporter.otlp.proto.http.trace_exporter.OTLPSpanExporter"):
+                with patch("opentelemetry.sdk.trace.export.BatchSpanProcessor"):
                     tracing.setup_tracing()
 
 
@@ -29,9 +29,9 @@ def test_setup_tracing_with_openai_instrumentation():
     from unittest.mock import MagicMock
 
     with patch.dict(os.environ, {"OTEL_EXPORTER_OTLP_ENDPOINT": "http://localhost:4318"}):
-        with patch("core.tracing.TracerProvider"):
-            with patch("core.tracing.OTLPSpanExporter"):
-                with patch("core.tracing.BatchSpanProcessor"):
+        with patch("opentelemetry.sdk.trace.TracerProvider"):
+            with patch("opentelemetry.exporter.otlp.proto.http.trace_exporter.OTLPSpanExporter"):
+                with patch("opentelemetry.sdk.trace.export.BatchSpanProcessor"):
                     with patch("core.tracing.trace.set_tracer_provider"):
                         # Mock OpenAI instrumentor to test lines 43-44
                         mock_instrumentor = MagicMock()
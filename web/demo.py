@@ -28,6 +28,7 @@ if PROJECT_ROOT not in sys.path:
     sys.path.insert(0, PROJECT_ROOT)
 
 from agents import create_agent, list_available_agents
+from agents.base import close_shared_clients
 from core.common import setup_logging
 from core.config import config
 from core.queue import SQLiteQueue
@@ -154,12 +155,18 @@ class StreamingQueue:
     async def get_context(self, max_messages: int = 10):
         return await self._sq.get_context(max_messages)
 
+    async def get_context_since(self, after_id: Optional[int], max_messages: int = 10):
+        return await self._sq.get_context_since(after_id, max_messages)
+
     async def get_last_sender(self):
         return await self._sq.get_last_sender()
 
     async def is_terminated(self):
         return await self._sq.is_terminated()
 
+    async def get_turn_state(self):
+        return await self._sq.get_turn_state()
+
     async def mark_terminated(self, reason: str):
         await self._sq.mark_terminated(reason)
         self._eq.put({"type": "terminated", "reason": reason})
@@ -187,6 +194,8 @@ def _run_conversation(session_id: str, session: Dict[str, Any]):
         session["event_queue"].put({"type": "error", "message": str(exc)})
     finally:
         session["event_queue"].put({"type": "done"})
+        # Shared SDK clients pin this loop; close them so the loop and sockets are freed
+        loop.run_until_complete(close_shared_clients())
         loop.close()
 
 
@@ -268,90 +277,91 @@ async def _async_conversation(session_id: str, session: Dict[str, Any]):
         api_key=key2,
     )
 
-    event_queue.put(
-        {
-            "type": "status",
-            "message": f'Starting conversation between {agent1.agent_name} and {agent2.agent_name} on "{topic}"...',
-        }
-    )
-
-    # Seed the conversation — agent1 goes first
-    event_queue.put({"type": "thinking", "agent": agent1.agent_name})
-
-    agent1.start_time = __import__("datetime").datetime.now()
-    agent2.start_time = __import__("datetime").datetime.now()
-
-    # Turn-based loop (sequential, not concurrent gather)
-    agents = [agent1, agent2]
-    names = [agent1.agent_name, agent2.agent_name]
+    try:
+        event_queue.put(
+            {
+                "type": "status",
+                "message": f'Starting conversation between {agent1.agent_name} and {agent2.agent_name} on "{topic}"...',
+            }
+        )
 
-    for turn in range(max_turns):
-        if session.get("stop_requested"):
-            event_queue.put({"type": "terminated", "reason": "stopped_by_user"})
-            return
+        # Seed the conversation — agent1 goes first
+        event_queue.put({"type": "thinking", "agent": agent1.agent_name})
 
-        current = agents[turn % 2]
-        _ = names[(turn + 1) % 2]
+        agent1.start_time = __import__("datetime").datetime.now()
+        agent2.start_time = __import__("datetime").datetime.now()
 
-        event_queue.put({"type": "thinking", "agent": current.agent_name})
+        # Turn-based loop (sequential, not concurrent gather)
+        agents = [agent1, agent2]
+        names = [agent1.agent_name, agent2.agent_name]
 
-        # check termination
-        if await queue.is_terminated():
-            break
+        for turn in range(max_turns):
+            if session.get("stop_requested"):
+                event_queue.put({"type": "terminated", "reason": "stopped_by_user"})
+                return
 
-        try:
-            content, tokens, response_time = await current.generate_response()
-        except Exception as exc:
-            event_queue.put({"type": "error", "message": f"{current.agent_name} error: {exc}"})
-            break
+            current = agents[turn % 2]
+            _ = names[(turn + 1) % 2]
 
-        # Check similarity
-        if current._check_similarity(content):
-            await queue.mark_terminated("repetition_detected")
-            break
+            event_queue.put({"type": "thinking", "agent": current.agent_name})
 
-        current.recent_responses.append(content)
-
-        from dataclasses import asdict
+            # check termination
+            if await queue.is_terminated():
+                break
 
-        from agents.base import TurnMetadata
+            try:
+                content, tokens, response_time = await current.generate_response()
+            except Exception as exc:
+                event_queue.put({"type": "error", "message": f"{current.agent_name} error: {exc}"})
+                break
 
-        meta = TurnMetadata(
-            model=current.model,
-            tokens=tokens,
-            response_time=round(response_time, 2),
-            turn=turn + 1,
-        )
-        await queue.add_message(current.agent_name, content, asdict(meta))
-        current.turn_count += 1
-
-        # Check termination signals in content
-        if term_reason := current._check_termination_signals(content):
-            if await should_defer_done(term_reason):
-                event_queue.put(
-                    {
-                        "type": "status",
-                        "message": "Proposed ending detected; allowing the other AI one response before termination.",
-                    }
-                )
-            else:
-                await queue.mark_terminated(term_reason)
+            # Check similarity
+            if current._check_similarity(content):
+                await queue.mark_terminated("repetition_detected")
                 break
 
-        # Deliberate delay so viewers can follow
-        await asyncio.sleep(delay)
+            current.recent_responses.append(content)
+
+            from agents.base import TurnMetadata
+
+            meta = TurnMetadata(
+                model=current.model,
+                tokens=tokens,
+                response_time=response_time,
+                turn=turn + 1,
+            )
+            await queue.add_message(current.agent_name, content, meta.to_dict())
+            current.turn_count += 1
+
+            # Check termination signals in content
+            if term_reason := current._check_termination_signals(content):
+                if await should_defer_done(term_reason):
+                    event_queue.put(
+                        {
+                            "type": "status",
+                            "message": "Proposed ending detected; allowing the other AI one response before termination.",
+                        }
+                    )
+                else:
+                    await queue.mark_terminated(term_reason)
+                    break
 
-    # If we finished normally
-    if not await queue.is_terminated():
-        await queue.mark_terminated("max_turns_reached")
+            # Deliberate delay so viewers can follow
+            await asyncio.sleep(delay)
 
-    # Clean up temp db
-    try:
-        db_path.unlink(missing_ok=True)
-        lock_path = Path(f"{db_path}.lock")
-        lock_path.unlink(missing_ok=True)
-    except Exception:
-        pass
+        # If we finished normally
+        if not await queue.is_terminated():
+            await queue.mark_terminated("max_turns_reached")
+
+        # Clean up temp db
+        try:
+            db_path.unlink(missing_ok=True)
+            lock_path = Path(f"{db_path}.lock")
+            lock_path.unlink(missing_ok=True)
+        except Exception:
+            pass
+    finally:
+        await asyncio.gather(agent1.aclose(), agent2.aclose())
 
 
 # ---------------------------------------------------------------------------